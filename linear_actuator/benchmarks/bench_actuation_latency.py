@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""End-to-end actuation latency: HopperController.send("r ...") to motion seen in mocap.
+
+Each trial records the mocap stream at rest, sends a step command, then
+stops and homes the carriage. The command send and any Arduino reply are
+timestamped. Motion onset is found offline in the timestamped
+MocapReceiver frames with a one-sided CUSUM on the distance from the
+resting position. The CUSUM alarm marks detection; the last frame at which
+the statistic was still zero marks the estimated onset.
+
+Stages reported (milliseconds after the send, all on time.perf_counter()):
+  send_call    HopperController.send() returning
+  reply        first reply line from the Arduino (if the firmware replies)
+  onset        first mocap frame of the motion (change-point estimate)
+  detection    CUSUM alarm frame
+With --simulate the simulator's own timestamps split onset further:
+  delivery     command line received by the firmware
+  mechanics    firmware receipt -> carriage moving (--motion-delay)
+  mocap        carriage moving -> onset frame received (frame period, UDP, Python)
+
+Usage (from the linear_actuator folder):
+    python -m benchmarks.bench_actuation_latency --simulate --motion-delay 0.015 --out actuation.json
+    python -m benchmarks.bench_actuation_latency --port /dev/ttyACM0 --trials 20 --speed 2000
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from benchmarks.common import ReplyReader, summarize_ms, write_report
+from src.arduino_controller import HopperController
+from src.arduino_sim import SimulatedArduino
+from src.mocap_receiver import MocapReceiver
+
+Frame = Tuple[float, float, float, float]  # (receive time, x, y, z)
+
+
+class FrameLog:
+    """Timestamped copy of every mocap frame, filled by a MocapReceiver listener."""
+
+    def __init__(self):
+        self.frames: List[Frame] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, t, data):
+        with self.lock:
+            self.frames.append((t, data.body_x, data.body_y, data.body_z))
+
+    def between(self, t_start: float, t_end: float) -> List[Frame]:
+        with self.lock:
+            return [f for f in self.frames if t_start <= f[0] <= t_end]
+
+
+def detect_onset(baseline: List[Frame], frames: List[Frame], drift: float = 0.5,
+                 threshold: float = 8.0, sigma_floor: float = 2e-5) -> Optional[Tuple[Frame, Frame]]:
+    """One-sided CUSUM change-point detection on distance from the resting position.
+
+    Args:
+        baseline: Frames at rest, before the command
+        frames: Frames after the command, in order
+        drift: Allowance subtracted per frame, in baseline standard deviations
+        threshold: Alarm level of the CUSUM statistic
+        sigma_floor: Minimum noise level (metres), for noiseless or quantized streams
+
+    Returns:
+        (onset frame, alarm frame), or None if no motion was detected
+    """
+    if not baseline:
+        return None
+    n = len(baseline)
+    rest = [sum(f[i] for f in baseline) / n for i in (1, 2, 3)]
+
+    def dist(f):
+        return math.sqrt(sum((f[i + 1] - rest[i]) ** 2 for i in range(3)))
+
+    d0 = [dist(f) for f in baseline]
+    mean = sum(d0) / n
+    sigma = max(sigma_floor, math.sqrt(sum((d - mean) ** 2 for d in d0) / n))
+
+    s = 0.0
+    onset = None
+    for f in frames:
+        s = max(0.0, s + (dist(f) - mean) / sigma - drift)
+        if s == 0.0:
+            onset = None
+        elif onset is None:
+            onset = f
+        if s > threshold:
+            return onset, f
+    return None
+
+
+def run_trial(ctrl: HopperController, reader: ReplyReader, log: FrameLog, args,
+              sim: Optional[SimulatedArduino] = None) -> dict:
+    """One step command; returns per-stage latencies in seconds (None when missing)."""
+    ctrl.drain()
+    time.sleep(args.pre)
+    first_reply = len(reader.replies)
+    first_cmd = len(sim.commands) if sim else 0
+
+    t0 = time.perf_counter()
+    ctrl.send(f"r {args.speed}", delay=0.0)
+    t_sent = time.perf_counter()
+    time.sleep(args.step_time)
+    motion_start = sim.motion_start_time if sim else None
+    ctrl.send("s", delay=0.0)
+    ctrl.send("h", delay=0.0)
+
+    result = {"send_call": t_sent - t0, "reply": None, "onset": None, "detection": None}
+    replies = reader.replies[first_reply:]
+    if replies:
+        result["reply"] = replies[0][0] - t0
+
+    baseline = log.between(t0 - args.pre, t0)
+    detected = detect_onset(baseline, log.between(t0, t0 + args.step_time),
+                            args.drift, args.threshold, args.sigma_floor)
+    if detected:
+        onset, alarm = detected
+        result["onset"] = onset[0] - t0
+        result["detection"] = alarm[0] - t0
+
+    if sim:
+        received = sim.commands[first_cmd][0] if len(sim.commands) > first_cmd else None
+        result["delivery"] = received - t0 if received else None
+        if motion_start is not None and received and motion_start >= received:
+            result["mechanics"] = motion_start - received
+            if detected:
+                result["mocap"] = detected[0][0] - motion_start
+    time.sleep(args.settle)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Command-to-motion latency via mocap")
+    parser.add_argument("--simulate", action="store_true", help="Use the simulated Arduino and mocap")
+    parser.add_argument("--port", default="/dev/ttyACM0", help="Arduino serial port (default: /dev/ttyACM0)")
+    parser.add_argument("--baud", type=int, default=115200, help="Baud rate (default: 115200)")
+    parser.add_argument("--mocap-port", type=int, default=9999, help="Mocap UDP port (default: 9999)")
+    parser.add_argument("--trials", type=int, default=20, help="Step commands (default: 20)")
+    parser.add_argument("--speed", type=int, default=2000, help="Speed of the step command (default: 2000)")
+    parser.add_argument("--step-time", type=float, default=0.5, help="Seconds to run before stopping (default: 0.5)")
+    parser.add_argument("--pre", type=float, default=0.3, help="Seconds of resting mocap before each step (default: 0.3)")
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds after homing before the next trial (default: 1.0)")
+    parser.add_argument("--drift", type=float, default=0.5, help="CUSUM drift in noise sigmas (default: 0.5)")
+    parser.add_argument("--threshold", type=float, default=8.0, help="CUSUM alarm level (default: 8)")
+    parser.add_argument("--sigma-floor", type=float, default=2e-5, help="Minimum mocap noise in metres (default: 2e-5)")
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated reply latency in seconds")
+    parser.add_argument("--motion-delay", type=float, default=0.01, help="Simulated mechanical delay in seconds")
+    parser.add_argument("--mocap-rate", type=float, default=240.0, help="Simulated mocap rate in Hz (default: 240)")
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        sim = SimulatedArduino(latency=args.latency, motion_delay=args.motion_delay,
+                               mocap_target=("127.0.0.1", args.mocap_port), mocap_rate=args.mocap_rate)
+        sim.start()
+        args.port = sim.port
+
+    log = FrameLog()
+    receiver = MocapReceiver("0.0.0.0", args.mocap_port)
+    receiver.add_listener(log)
+    receiver.start()
+    trials = []
+    try:
+        # HopperController prints every command; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            ctrl = HopperController(args.port, args.baud)
+            reader = ReplyReader(ctrl)
+            reader.start()
+            for _ in range(args.trials):
+                trials.append(run_trial(ctrl, reader, log, args, sim))
+            reader.stop()
+            ctrl.close()
+    finally:
+        receiver.stop()
+        if sim:
+            sim.stop()
+
+    if not receiver.packet_count:
+        print(f"[ERROR] No mocap frames on port {args.mocap_port}")
+        return
+
+    stages = ["send_call", "delivery", "reply", "mechanics", "mocap", "onset", "detection"]
+    results = {"trials": trials, "missed_onsets": sum(1 for t in trials if t["onset"] is None),
+               "mocap_frames": receiver.packet_count, "stages_ms": {}}
+    frames = log.frames
+    if len(frames) > 1:
+        results["frame_interval_ms"] = summarize_ms([b[0] - a[0] for a, b in zip(frames, frames[1:])])
+    for stage in stages:
+        values = [t[stage] for t in trials if t.get(stage) is not None]
+        if values:
+            results["stages_ms"][stage] = summarize_ms(values)
+
+    for stage, r in results["stages_ms"].items():
+        print(f"{stage:>10}: p50 {r['p50']:7.2f} ms  p90 {r['p90']:7.2f} ms  max {r['max']:7.2f} ms  (n={r['n']})")
+    if "frame_interval_ms" in results:
+        print(f"mocap frame interval p50 {results['frame_interval_ms']['p50']:.2f} ms "
+              f"(onset resolution), {results['missed_onsets']} trial(s) without detected motion")
+
+    if args.out:
+        write_report(args.out, "actuation_latency", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""UDP load-generation and latency benchmark for MocapReceiver.
+
+Floods a MocapReceiver on loopback from a separate sender process at each
+configured rate / packet size / consumer count and reports:
+  - sustained throughput and drops (sent - received - rejected)
+  - send -> get_latest_data() latency percentiles, via a sequence number
+    carried in body_x (exact for float32 up to 2**24 packets)
+  - CPU usage of the receiving process
+
+Consumers are extra threads polling get_latest_data() the way the GUI
+render loop and the recorder do.
+
+Usage (from the linear_actuator folder):
+    python -m benchmarks.bench_receiver --rates 100,1000,5000 --consumers 0,1,4 --out results.json
+"""
+
+import argparse
+import multiprocessing as mp
+import struct
+import threading
+import time
+from typing import List
+
+from benchmarks.common import summarize_ms, write_report
+from src.mocap_receiver import MocapReceiver
+
+MAX_SEQ = 2 ** 24  # Largest integer float32 holds exactly
+
+
+def _sender(port: int, rate: float, size: int, count: int, send_times, go):
+    """Sender process: paced sends on an absolute schedule.
+
+    time.perf_counter() is CLOCK_MONOTONIC on Linux, so timestamps written
+    here are comparable with the receiving process.
+    """
+    import socket
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    padding = bytes(max(0, size - 12))
+    period = 1.0 / rate
+    go.wait()
+    start = time.perf_counter()
+    for seq in range(count):
+        deadline = start + seq * period
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            if remaining > 0.0005:
+                time.sleep(remaining - 0.0003)
+        payload = struct.pack('fff', float(seq), 0.0, 0.0) + padding
+        send_times[seq] = time.perf_counter()
+        sock.sendto(payload[:size], ("127.0.0.1", port))
+    sock.close()
+
+
+def _probe(receiver: MocapReceiver, send_times, latencies: List[float], seen: set,
+           interval: float, done: threading.Event):
+    """Poll get_latest_data() and time each newly visible sequence number."""
+    last_seq = -1
+    while not done.is_set():
+        data = receiver.get_latest_data()
+        if data is not None:
+            seq = int(data.body_x)
+            if seq != last_seq:
+                latencies.append(time.perf_counter() - send_times[seq])
+                seen.add(seq)
+                last_seq = seq
+        if interval > 0:
+            time.sleep(interval)
+
+
+def _consumer(receiver: MocapReceiver, interval: float, done: threading.Event):
+    """Simulated consumer: fetch and format a row like the recorder does."""
+    while not done.is_set():
+        data = receiver.get_latest_data()
+        if data:
+            _ = (f"{data.body_x},{data.body_y},{data.body_z},"
+                 f"{data.foot_x},{data.foot_y},{data.foot_z}\n")
+        if interval > 0:
+            time.sleep(interval)
+        else:
+            time.sleep(0)  # Yield the GIL without sleeping
+
+
+def run_trial(port: int, rate: float, size: int, consumers: int, duration: float,
+              probe_interval: float, consumer_interval: float, drain: float = 0.2) -> dict:
+    """Run one load level and return its measurements."""
+    count = min(int(rate * duration), MAX_SEQ)
+    send_times = mp.Array('d', count, lock=False)
+    go = mp.Event()
+    sender = mp.Process(target=_sender, args=(port, rate, size, count, send_times, go), daemon=True)
+    sender.start()
+
+    receiver = MocapReceiver(ip="127.0.0.1", port=port)
+    receiver.start()
+    if receiver.sockfd is None:
+        sender.terminate()
+        raise RuntimeError(f"Cannot bind 127.0.0.1:{port}")
+
+    done = threading.Event()
+    latencies: List[float] = []
+    seen: set = set()
+    threads = [threading.Thread(target=_probe,
+                                args=(receiver, send_times, latencies, seen, probe_interval, done),
+                                daemon=True)]
+    threads += [threading.Thread(target=_consumer, args=(receiver, consumer_interval, done), daemon=True)
+                for _ in range(consumers)]
+    for t in threads:
+        t.start()
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    go.set()
+    sender.join()
+    send_elapsed = time.perf_counter() - wall_start
+    time.sleep(drain)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    done.set()
+    for t in threads:
+        t.join()
+    receiver.stop()
+
+    received = receiver.packet_count
+    rejected = receiver.rejected_count
+    dropped = count - received - rejected
+    return {
+        "rate_hz": rate,
+        "packet_bytes": size,
+        "consumers": consumers,
+        "sent": count,
+        "achieved_send_hz": count / send_elapsed if send_elapsed > 0 else float("nan"),
+        "received": received,
+        "rejected": rejected,
+        "dropped": dropped,
+        "drop_pct": 100.0 * dropped / count if count else 0.0,
+        "throughput_hz": received / send_elapsed if send_elapsed > 0 else float("nan"),
+        "observed_seqs": len(seen),
+        "latency_ms": summarize_ms(latencies),
+        "cpu_pct": 100.0 * cpu / wall,
+    }
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(v) for v in text.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MocapReceiver load and latency benchmark")
+    parser.add_argument("--port", type=int, default=9998, help="Loopback UDP port (default: 9998)")
+    parser.add_argument("--rates", type=_int_list, default=[100, 500, 1000, 5000, 10000],
+                        help="Comma-separated packet rates in Hz")
+    parser.add_argument("--sizes", type=_int_list, default=[12],
+                        help="Comma-separated datagram sizes in bytes (receiver accepts only 12)")
+    parser.add_argument("--consumers", type=_int_list, default=[0, 1, 2, 4],
+                        help="Comma-separated numbers of extra polling consumers")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per trial (default: 3)")
+    parser.add_argument("--probe-interval", type=float, default=0.0002,
+                        help="Latency probe poll interval in seconds (default: 0.0002)")
+    parser.add_argument("--consumer-interval", type=float, default=0.01,
+                        help="Consumer poll interval in seconds, 0 = busy (default: 0.01)")
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rate':>7} {'size':>5} {'cons':>4} {'recv/s':>9} {'drop%':>6} "
+          f"{'p50ms':>7} {'p99ms':>7} {'maxms':>7} {'cpu%':>6}")
+    for size in args.sizes:
+        for consumers in args.consumers:
+            for rate in args.rates:
+                r = run_trial(args.port, rate, size, consumers, args.duration,
+                              args.probe_interval, args.consumer_interval)
+                results.append(r)
+                lat = r["latency_ms"]
+                print(f"{rate:>7} {size:>5} {consumers:>4} {r['throughput_hz']:>9.0f} {r['drop_pct']:>6.2f} "
+                      f"{lat['p50']:>7.3f} {lat['p99']:>7.3f} {lat['max']:>7.3f} {r['cpu_pct']:>6.1f}")
+
+    if args.out:
+        write_report(args.out, "mocap_receiver", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
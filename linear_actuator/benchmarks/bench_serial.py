@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Serial command-path benchmark against the simulated Arduino.
+
+Measures, with no hardware attached:
+  - HopperController connect time (port open + boot wait)
+  - send() call duration, host -> firmware delivery and reply latency,
+    with the default 100 ms post-send delay and with delay=0
+  - duration of the GUI command handlers (_cmd_home, _cmd_run, ...)
+
+Usage (from the linear_actuator folder):
+    python -m benchmarks.bench_serial --count 50 --latency 0.002 --out serial.json
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.common import ReplyReader, summarize_ms, write_report
+from main import LinearActuatorGUI
+from src.arduino_controller import HopperController
+from src.arduino_sim import SimulatedArduino
+
+COMMANDS = ["r 1000", "?", "s", "h"]
+
+
+def bench_send(ctrl: HopperController, sim: SimulatedArduino, reader: ReplyReader,
+               count: int, delay: float) -> dict:
+    """Time count commands through HopperController.send()."""
+    first_cmd = len(sim.commands)
+    first_reply = len(reader.replies)
+    call_times, sent_at = [], []
+    start = time.perf_counter()
+    for i in range(count):
+        cmd = COMMANDS[i % len(COMMANDS)]
+        t0 = time.perf_counter()
+        ctrl.send(cmd, delay=delay)
+        call_times.append(time.perf_counter() - t0)
+        sent_at.append(t0)
+    total = time.perf_counter() - start
+    reader.wait_for(first_reply + count)
+
+    delivered = [sim.commands[first_cmd + i][0] - sent_at[i]
+                 for i in range(min(count, len(sim.commands) - first_cmd))]
+    replies = reader.replies[first_reply:first_reply + count]
+    reply_lat = [replies[i][0] - sent_at[i] for i in range(len(replies))]
+    return {
+        "delay_s": delay,
+        "commands": count,
+        "throughput_cmd_s": count / total if total > 0 else float("nan"),
+        "call_ms": summarize_ms(call_times),
+        "delivery_ms": summarize_ms(delivered),
+        "reply_ms": summarize_ms(reply_lat),
+        "missing_replies": count - len(replies),
+    }
+
+
+def bench_gui_handlers(ctrl: HopperController, port: str, baud: int, count: int) -> dict:
+    """Time the GUI command handlers with the controller already connected."""
+    gui = LinearActuatorGUI(arduino_port=port, arduino_baud=baud)
+    gui.arduino = ctrl
+    handlers = {
+        "home": gui._cmd_home,
+        "run": lambda: gui._cmd_run(1000),
+        "run_current": gui._cmd_run_current,
+        "stop": gui._cmd_stop,
+    }
+    results = {}
+    for name, handler in handlers.items():
+        durations = []
+        for _ in range(count):
+            t0 = time.perf_counter()
+            handler()
+            durations.append(time.perf_counter() - t0)
+        results[name] = summarize_ms(durations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial command-path benchmark (simulated Arduino)")
+    parser.add_argument("--count", type=int, default=40, help="Commands per measurement (default: 40)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated firmware reply latency in seconds")
+    parser.add_argument("--boot-time", type=float, default=0.1, help="Simulated boot time in seconds")
+    parser.add_argument("--baud", type=int, default=115200, help="Baud rate (default: 115200)")
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    sim = SimulatedArduino(latency=args.latency, boot_time=args.boot_time)
+    sim.start()
+    results = {}
+    try:
+        # HopperController prints every command; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            ctrl = HopperController(sim.port, args.baud)
+            results["connect_s"] = time.perf_counter() - t0
+
+            reader = ReplyReader(ctrl)
+            reader.start()
+            results["send_default_delay"] = bench_send(ctrl, sim, reader, args.count, delay=0.1)
+            results["send_no_delay"] = bench_send(ctrl, sim, reader, args.count, delay=0.0)
+            results["gui_handlers_ms"] = bench_gui_handlers(ctrl, sim.port, args.baud, args.count // 4 or 1)
+            reader.stop()
+            ctrl.close()
+    finally:
+        sim.stop()
+
+    print(f"connect: {results['connect_s']:.3f} s")
+    for key in ("send_default_delay", "send_no_delay"):
+        r = results[key]
+        print(f"{key}: {r['throughput_cmd_s']:.1f} cmd/s, call p50 {r['call_ms']['p50']:.3f} ms, "
+              f"delivery p50 {r['delivery_ms']['p50']:.3f} ms, reply p50 {r['reply_ms']['p50']:.3f} ms "
+              f"(p99 {r['reply_ms']['p99']:.3f} ms)")
+    for name, r in results["gui_handlers_ms"].items():
+        print(f"gui {name}: p50 {r['p50']:.3f} ms, max {r['max']:.3f} ms")
+
+    if args.out:
+        write_report(args.out, "serial_command_path", vars(args), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Shared helpers for the benchmark scripts: statistics, JSON reports, reply timing."""
+
+import json
+import math
+import platform
+import threading
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def summarize_ms(values: List[float]) -> dict:
+    """Summarize durations in seconds as millisecond percentiles."""
+    values = sorted(values)
+    return {
+        "n": len(values),
+        "mean": (sum(values) / len(values) * 1000) if values else float("nan"),
+        "p50": percentile(values, 50) * 1000,
+        "p90": percentile(values, 90) * 1000,
+        "p99": percentile(values, 99) * 1000,
+        "max": (values[-1] if values else float("nan")) * 1000,
+    }
+
+
+def write_report(path: str, benchmark: str, config: dict, results) -> None:
+    """Write results with host metadata so runs can be compared over time."""
+    report = {
+        "benchmark": benchmark,
+        "timestamp": datetime.now().isoformat(),
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "config": config,
+        "results": results,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Results written to {path}")
+
+
+class ReplyReader:
+    """Background reader that timestamps every reply line of a HopperController."""
+
+    def __init__(self, ctrl):
+        self.ctrl = ctrl
+        self.ser = ctrl.ser
+        self.replies: List[Tuple[float, str]] = []
+        self.stop_flag = False
+        self.thread = threading.Thread(target=self._read_loop, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_flag = True
+        self.thread.join()
+
+    def wait_for(self, count: int, timeout: float = 2.0) -> bool:
+        deadline = time.perf_counter() + timeout
+        while len(self.replies) < count and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        return len(self.replies) >= count
+
+    def _read_loop(self):
+        self.ser.timeout = 0.05
+        while not self.stop_flag:
+            line = self.ser.readline()
+            if line:
+                text = line.decode(errors="replace").strip()
+                if text and not self.ctrl.is_boot_line(text):
+                    self.replies.append((time.perf_counter(), text))
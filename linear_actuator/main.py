@@ -14,11 +14,15 @@ from pathlib import Path
 from typing import Optional
 
 import argparse
+import atexit
 import sys
 import serial
 
+from src import instrumentation
+from src.actuator_daemon import ARDUINO_COMMANDS, DEFAULT_SOCKET, ActuatorDaemon, DaemonClient, is_daemon_running
 from src.arduino_controller import HopperController
-from src.mocap_receiver import MocapReceiver
+from src.mocap_receiver import RECORD_HEADER, MocapReceiver
+from src.segmented_recorder import SegmentedRecorder
 
 DEFAULT_PORT = "/dev/ttyACM0"
 DEFAULT_BAUD = 115200
@@ -31,7 +35,8 @@ DEFAULT_MOCAP_PORT = 9999
 class LinearActuatorGUI:
     """Lightweight curses GUI for Linear Actuator control and mocap recording."""
 
-    def __init__(self, arduino_port: str, arduino_baud: int, mocap_ip: str = "0.0.0.0", mocap_port: int = 9999, speed_low: int = 50, speed_high: int = 100):
+    def __init__(self, arduino_port: str, arduino_baud: int, mocap_ip: str = "0.0.0.0", mocap_port: int = 9999, speed_low: int = 50, speed_high: int = 100,
+                 segment_seconds: Optional[float] = None, segment_mb: Optional[float] = None, compression: Optional[str] = None):
         self.arduino_port = arduino_port
         self.arduino_baud = arduino_baud
         self.mocap_ip = mocap_ip
@@ -50,6 +55,12 @@ class LinearActuatorGUI:
         self.record_thread: Optional[threading.Thread] = None
         self.stop_recording = False
 
+        # Segmented recording (session directory + manifest) when any option is set
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = int(segment_mb * 1024 * 1024) if segment_mb else None
+        self.compression = compression
+        self.segmented = bool(segment_seconds or segment_mb or compression)
+
         self.status_msg = ""
         self.status_time = 0.0
 
@@ -58,6 +69,13 @@ class LinearActuatorGUI:
         self.prev_y_time = None
         self.velocity_y = 0.0
         
+        # Diagnostics pane (instrumentation stats)
+        self.show_diagnostics = False
+        self._t_render = instrumentation.timer("gui.render")
+        self._t_input = instrumentation.timer("gui.input")
+        self._t_record_write = instrumentation.timer("record.write")
+        self._c_record_rows = instrumentation.counter("record.rows")
+
         # Menu items (will be generated dynamically)
         self.menu_items = []
         self._update_menu_items()
@@ -166,11 +184,13 @@ class LinearActuatorGUI:
                     if action is None:
                         break
                     if action:
-                        action()
+                        with self._t_input:
+                            action()
             
             # Render at controlled interval to avoid CPU thrashing
             if (now - last_render) > render_interval:
-                self._render(stdscr, selected)
+                with self._t_render:
+                    self._render(stdscr, selected)
                 last_render = now
                 frame_count += 1
 
@@ -255,10 +275,33 @@ class LinearActuatorGUI:
                 rec_msg = rec_msg[:max_x-2].ljust(max_x-2)
                 stdscr.addstr(status_y + 2, 2, rec_msg, curses.color_pair(4))  # Yellow for recording
 
+            # Diagnostics pane
+            if self.show_diagnostics:
+                self._render_diagnostics(stdscr, status_y + 4, max_y, max_x)
+
             stdscr.refresh()
         except Exception as e:
             pass  # Silently ignore render errors (window resize, etc)
 
+    def _render_diagnostics(self, stdscr, start_y: int, max_y: int, max_x: int):
+        """Render instrumentation timers and counters, one per line."""
+        if not instrumentation.is_enabled():
+            lines = ["Diagnostics off (start with --instrument)"]
+        else:
+            stats = instrumentation.snapshot()
+            lines = [f"{'timer':<16}{'n':>8}{'p50ms':>9}{'p99ms':>9}{'maxms':>9}"]
+            for name, t in stats["timers"].items():
+                if t["count"]:
+                    lines.append(f"{name:<16}{t['count']:>8}{t['p50_ms']:>9.3f}"
+                                 f"{t['p99_ms']:>9.3f}{t['max_ms']:>9.3f}")
+            for name, value in stats["counters"].items():
+                lines.append(f"{name:<16}{value:>8}")
+        for i, line in enumerate(lines):
+            y = start_y + i
+            if y >= max_y:
+                break
+            stdscr.addstr(y, 2, line[:max_x-2])
+
     # ===== Command handlers =====
 
     def _cmd_home(self):
@@ -292,12 +335,17 @@ class LinearActuatorGUI:
             return
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.record_file = Path("mocap_data") / f"linear_actuator_{timestamp}.csv"
+        if self.segmented:
+            self.record_file = Path("mocap_data") / f"linear_actuator_{timestamp}"
+            record_loop = self._record_segmented_loop
+        else:
+            self.record_file = Path("mocap_data") / f"linear_actuator_{timestamp}.csv"
+            record_loop = self._record_loop
         self.record_file.parent.mkdir(parents=True, exist_ok=True)
 
         self.recording = True
         self.stop_recording = False
-        self.record_thread = threading.Thread(target=self._record_loop, daemon=True)
+        self.record_thread = threading.Thread(target=record_loop, daemon=True)
         self.record_thread.start()
         self._set_status(f"Recording...")
 
@@ -306,10 +354,20 @@ class LinearActuatorGUI:
             self._set_status("Not recording")
             return
 
+        if self.stop_recording:
+            self._set_status("Still saving...")
+            return
+
         self.stop_recording = True
-        if self.record_thread:
-            self.record_thread.join(timeout=1)
+        self._set_status("Saving...")
+        # Segmented sessions return only after the last segment is compressed, which
+        # can take seconds: wait on a helper thread so the GUI keeps running
+        threading.Thread(target=self._finish_recording, daemon=True).start()
 
+    def _finish_recording(self):
+        """Helper thread: wait for the record thread, then report the saved file."""
+        if self.record_thread:
+            self.record_thread.join()
         self.recording = False
         self._set_status(f"Saved: {self.record_file.name if self.record_file else 'unknown'}")
 
@@ -327,6 +385,10 @@ class LinearActuatorGUI:
         self.speed_input_buffer = str(self.current_speed)  # Pre-fill with current speed
         self._set_status("Enter speed (0-15000), Enter to confirm, Esc to cancel")
 
+    def _cmd_diagnostics(self):
+        """Toggle the diagnostics pane."""
+        self.show_diagnostics = not self.show_diagnostics
+
     def _cmd_trial(self):
         """Run full trial sequence: home -> record start -> run -> stop record."""
         import time
@@ -376,28 +438,50 @@ class LinearActuatorGUI:
             ("Stop", self._cmd_stop),
             ("Record Start", self._cmd_record_start),
             ("Record Stop", self._cmd_record_stop),
+            ("Diagnostics", self._cmd_diagnostics),
             ("Exit", None),
         ]
 
     def _stop_recording(self):
         self.stop_recording = True
         if self.record_thread and self.record_thread.is_alive():
-            self.record_thread.join(timeout=1)
+            self.record_thread.join()
         self.recording = False
 
     def _record_loop(self):
         """Background thread: save mocap data to CSV."""
         try:
             with open(self.record_file, 'w') as f:
-                f.write("timestamp,body_x,body_y,body_z,foot_x,foot_y,foot_z\n")
+                f.write(RECORD_HEADER + "\n")
+
+                while not self.stop_recording:
+                    data = self.mocap.get_latest_data()
+                    if data:
+                        with self._t_record_write:
+                            ts = datetime.now().isoformat()
+                            f.write(f"{ts},{data.body_x},{data.body_y},{data.body_z},"
+                                    f"{data.foot_x},{data.foot_y},{data.foot_z}\n")
+                            f.flush()
+                        self._c_record_rows.inc()
+                    time.sleep(0.01)
+        except Exception as e:
+            self._set_status(f"Record error: {str(e)[:30]}")
+            self.recording = False
 
+    def _record_segmented_loop(self):
+        """Background thread: save mocap data to a segmented, compressed session directory."""
+        try:
+            with SegmentedRecorder(self.record_file, RECORD_HEADER, max_seconds=self.segment_seconds,
+                                   max_bytes=self.segment_bytes, compression=self.compression) as rec:
                 while not self.stop_recording:
                     data = self.mocap.get_latest_data()
                     if data:
-                        ts = datetime.now().isoformat()
-                        f.write(f"{ts},{data.body_x},{data.body_y},{data.body_z},"
-                                f"{data.foot_x},{data.foot_y},{data.foot_z}\n")
-                        f.flush()
+                        with self._t_record_write:
+                            now = datetime.now()
+                            rec.write_row(now.timestamp(),
+                                          f"{now.isoformat()},{data.body_x},{data.body_y},{data.body_z},"
+                                          f"{data.foot_x},{data.foot_y},{data.foot_z}\n")
+                        self._c_record_rows.inc()
                     time.sleep(0.01)
         except Exception as e:
             self._set_status(f"Record error: {str(e)[:30]}")
@@ -410,12 +494,19 @@ class LinearActuatorGUI:
 
 # ===== CLI HELPER FUNCTIONS =====
 
-def run_once(ctrl, speed):
-    """Home and run sequence."""
+def run_once(ctrl, speed, home_wait=3.0, run_time=5.0):
+    """Home and run sequence.
+
+    Args:
+        ctrl: HopperController or DaemonClient
+        speed: Run speed
+        home_wait: Seconds to wait for homing before running
+        run_time: Seconds to keep running before returning (the motor is not stopped)
+    """
     ctrl.send("h")
-    time.sleep(3)      
+    time.sleep(home_wait)
     ctrl.send(f"r {speed}")
-    time.sleep(5) 
+    time.sleep(run_time)
 
 
 def interactive(ctrl):
@@ -430,6 +521,10 @@ def interactive(ctrl):
                 break
             if cmd == "":
                 continue
+            if cmd.split()[0] not in ARDUINO_COMMANDS:
+                # Daemon verbs like "shutdown" would stop a service other clients share
+                print(f"[WARN] Unknown command: {cmd}")
+                continue
             ctrl.send(cmd)
         except KeyboardInterrupt:
             print("\n[CTRL-C]")
@@ -453,13 +548,52 @@ def main():
 
     parser.add_argument("--home", action="store_true", help="Send home command and exit")
     parser.add_argument("--run", type=int, metavar="SPEED", help="Home, run at SPEED, then exit")
+    parser.add_argument("--home-wait", type=float, default=3.0,
+                        help="--run: seconds to wait for homing before running (default: 3)")
+    parser.add_argument("--run-time", type=float, default=5.0,
+                        help="--run: seconds to run before exiting (default: 5)")
     parser.add_argument("--interactive", action="store_true", help="Interactive CLI mode")
     parser.add_argument("--gui", action="store_true", help="Launch GUI (default if no other mode)")
+    parser.add_argument("--segment-seconds", type=float,
+                        help="Record into segments of at most this many seconds")
+    parser.add_argument("--segment-mb", type=float, help="Record into segments of at most this many MB (raw)")
+    parser.add_argument("--compress", choices=["zlib", "lzma"],
+                        help="Compress closed segments in the background (.csv.gz / .csv.xz)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run the persistent actuator daemon (owns serial port and mocap)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET,
+                        help=f"Daemon Unix socket (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="CLI modes: open the serial port directly even if a daemon is running")
+
+    parser.add_argument("--instrument", action="store_true",
+                        help="Enable hot-path timers (GUI Diagnostics pane; add --stats-out to save them)")
+    parser.add_argument("--stats-out", metavar="PATH",
+                        help="Write instrumentation stats as JSON on exit and on SIGUSR1 (implies --instrument)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="Run the sampling profiler and write collapsed stacks to PATH on exit")
+    parser.add_argument("--profile-hz", type=float, default=200.0, help="Profiler sample rate (default: 200)")
 
     args = parser.parse_args()
 
+    # Instrumentation must be on before the GUI / controller / receiver are created
+    if args.instrument or args.stats_out:
+        instrumentation.enable()
+    if args.stats_out:
+        instrumentation.install_signal_dump(args.stats_out)
+        atexit.register(instrumentation.dump_json, args.stats_out)
+    if args.profile:
+        profiler = instrumentation.SamplingProfiler(hz=args.profile_hz)
+        profiler.start()
+
+        def _write_profile():
+            profiler.stop()
+            profiler.write_collapsed(args.profile)
+
+        atexit.register(_write_profile)
+
     # Determine mode
-    mode_count = sum([args.home, args.run is not None, args.interactive, args.gui])
+    mode_count = sum([args.home, args.run is not None, args.interactive, args.gui, args.daemon])
     use_gui = (mode_count == 0) or args.gui
     use_cli_mode = args.home or args.run is not None or args.interactive
 
@@ -468,7 +602,9 @@ def main():
         try:
             gui = LinearActuatorGUI(arduino_port=args.port, arduino_baud=args.baud,
                            mocap_ip=args.mocap_ip, mocap_port=args.mocap_port,
-                           speed_low=args.speed_low, speed_high=args.speed_high)
+                           speed_low=args.speed_low, speed_high=args.speed_high,
+                           segment_seconds=args.segment_seconds, segment_mb=args.segment_mb,
+                           compression=args.compress)
             curses.wrapper(gui.run)
         except KeyboardInterrupt:
             print("\n[CTRL-C] Stopping motor and exiting...")
@@ -484,18 +620,34 @@ def main():
             sys.exit(1)
         return
 
-    # CLI modes
-    try:
-        ctrl = HopperController(args.port, args.baud)
-    except serial.SerialException as e:
-        print(f"[ERROR] Cannot open serial port: {e}", file=sys.stderr)
-        sys.exit(1)
+    # Daemon mode
+    if args.daemon:
+        daemon = ActuatorDaemon(args.port, args.baud, mocap_ip=args.mocap_ip,
+                                mocap_port=args.mocap_port, socket_path=args.socket)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            print("\n[CTRL-C] Daemon stopped")
+        except (RuntimeError, serial.SerialException) as e:
+            print(f"[ERROR] Daemon failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    # CLI modes: go through the daemon when one is running, else open the port
+    if not args.no_daemon and is_daemon_running(args.socket):
+        ctrl = DaemonClient(args.socket)
+    else:
+        try:
+            ctrl = HopperController(args.port, args.baud)
+        except serial.SerialException as e:
+            print(f"[ERROR] Cannot open serial port: {e}", file=sys.stderr)
+            sys.exit(1)
 
     try:
         if args.home:
             ctrl.send("h")
         elif args.run is not None:
-            run_once(ctrl, args.run)
+            run_once(ctrl, args.run, home_wait=args.home_wait, run_time=args.run_time)
         elif args.interactive:
             interactive(ctrl)
     finally:
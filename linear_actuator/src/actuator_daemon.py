@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Persistent actuator daemon and its thin client.
+
+The daemon keeps the serial port (and the mocap receiver) open so CLI calls
+do not pay the Arduino reset and boot wait on every invocation. Clients talk
+to it over a Unix domain socket with one text line per request and one line
+per response:
+
+    h | s | r <speed>   forward to the Arduino          -> "OK" or "OK <ack>"
+    ?                   forward and wait for the reply  -> "OK <reply>"
+    mocap               latest mocap body position      -> "OK <x> <y> <z>"
+    ping                liveness check                  -> "OK pong"
+    shutdown            stop the daemon                 -> "OK bye"
+
+Errors come back as "ERR <message>". A connection may carry any number of
+requests, so batch scripts can keep one socket open for a whole session.
+
+Usage (from the linear_actuator folder):
+    python main.py --daemon &
+    python main.py --home          # uses the daemon when its socket is live
+"""
+
+import os
+import signal
+import socket
+import socketserver
+import threading
+from typing import Optional
+
+from src.arduino_controller import HopperController
+from src.mocap_receiver import MocapReceiver
+
+DEFAULT_SOCKET = "/tmp/hopper_actuator.sock"
+QUERY_TIMEOUT = 0.5  # Seconds to wait for the reply to "?" (and for motion acks)
+ARDUINO_COMMANDS = ("h", "s", "r", "?")  # Forwarded to the firmware; everything else is a daemon verb
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serve line requests on one client connection."""
+
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode(errors="replace").strip()
+            if not line:
+                continue
+            response = self.server.daemon.handle_command(line)
+            self.wfile.write((response + "\n").encode())
+            self.wfile.flush()
+            if line == "shutdown":
+                break
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ActuatorDaemon:
+    """Owns the HopperController and MocapReceiver for the daemon's lifetime."""
+
+    def __init__(self, port: str, baud: int, mocap_ip: str = "0.0.0.0", mocap_port: int = 9999,
+                 socket_path: str = DEFAULT_SOCKET):
+        """Initialize the daemon.
+
+        Args:
+            port: Serial port of the Arduino
+            baud: Baud rate
+            mocap_ip: Mocap listen IP
+            mocap_port: Mocap UDP port
+            socket_path: Unix socket the clients connect to
+        """
+        self.port = port
+        self.baud = baud
+        self.mocap_ip = mocap_ip
+        self.mocap_port = mocap_port
+        self.socket_path = socket_path
+
+        self.arduino: Optional[HopperController] = None
+        self.mocap: Optional[MocapReceiver] = None
+        self.server: Optional[_Server] = None
+        self.serial_lock = threading.Lock()
+        # Whether the firmware acknowledges h/s/r with a line; cleared after the
+        # first ack times out so silent firmware only pays QUERY_TIMEOUT once
+        self.motion_acks = True
+
+    def serve_forever(self):
+        """Connect hardware and serve clients until shutdown or SIGTERM."""
+        if is_daemon_running(self.socket_path):
+            raise RuntimeError(f"Daemon already running on {self.socket_path}")
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Stale socket from a crashed daemon
+
+        self.arduino = HopperController(self.port, self.baud)
+        self.mocap = MocapReceiver(ip=self.mocap_ip, port=self.mocap_port)
+        self.mocap.start()
+
+        self.server = _Server(self.socket_path, _RequestHandler)
+        self.server.daemon = self
+        signal.signal(signal.SIGTERM, lambda *_: self._request_shutdown())
+        print(f"[OK] Daemon listening on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            try:
+                self.arduino.send("s", delay=0)
+            except Exception:
+                pass  # Ignore errors during cleanup
+            self.mocap.stop()
+            self.arduino.close()
+
+    def handle_command(self, line: str) -> str:
+        """Execute one request line and return the response line."""
+        cmd = line.split()[0]
+        if cmd == "ping":
+            return "OK pong"
+        if cmd == "shutdown":
+            self._request_shutdown()
+            return "OK bye"
+        if cmd == "mocap":
+            data = self.mocap.get_latest_data() if self.mocap else None
+            if data is None:
+                return "ERR no mocap data"
+            return f"OK {data.body_x} {data.body_y} {data.body_z}"
+        if cmd in ARDUINO_COMMANDS:
+            try:
+                with self.serial_lock:
+                    self.arduino.drain()
+                    self.arduino.send(line, delay=0)
+                    if cmd == "?":
+                        reply = self.arduino.read_line(timeout=QUERY_TIMEOUT)
+                        return f"OK {reply}" if reply else "ERR no reply"
+                    # Consume the ack here, or the next "?" would read it as its reply
+                    if self.motion_acks:
+                        ack = self.arduino.read_line(timeout=QUERY_TIMEOUT)
+                        if ack is None:
+                            self.motion_acks = False
+                        else:
+                            return f"OK {ack}"
+                return "OK"
+            except Exception as e:
+                return f"ERR {e}"
+        return f"ERR unknown command: {line}"
+
+    def _request_shutdown(self):
+        # shutdown() blocks until serve_forever() returns, so never call it on the serving thread
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class DaemonClient:
+    """Thin client with the same send()/close() interface as HopperController."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: float = 5.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self.rfile = self.sock.makefile('rb')
+
+    def request(self, line: str) -> str:
+        """Send one request line and return the response line."""
+        self.sock.sendall((line + "\n").encode())
+        response = self.rfile.readline().decode(errors="replace").strip()
+        if not response:
+            raise ConnectionError("Daemon closed the connection")
+        return response
+
+    def send(self, cmd, delay=0.0):
+        """Forward an Arduino command through the daemon.
+
+        Args:
+            cmd: Command string
+            delay: Unused; the daemon acknowledges once the command is written
+        """
+        response = self.request(cmd)
+        print(f">> {cmd}  [{response}]")
+        return response
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+def is_daemon_running(socket_path: str = DEFAULT_SOCKET) -> bool:
+    """Return True if a daemon answers on socket_path."""
+    if not os.path.exists(socket_path):
+        return False
+    try:
+        client = DaemonClient(socket_path, timeout=1.0)
+    except OSError:
+        return False
+    try:
+        return client.request("ping") == "OK pong"
+    except OSError:
+        return False
+    finally:
+        client.close()
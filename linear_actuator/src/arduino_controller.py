@@ -4,25 +4,75 @@
 import serial
 import time
 
+try:
+    from src import instrumentation
+except ImportError:  # Run directly from src/ rather than as src.arduino_controller
+    import instrumentation
+
+# Lines the firmware prints after a reset rather than in reply to a command
+BOOT_LINES = ("Hopper ready",)
+
 
 class HopperController:
     """Controller for Hopper robot via serial communication."""
 
-    def __init__(self, port, baud):
+    def __init__(self, port, baud, boot_timeout=2.0):
         """Initialize serial connection to Arduino.
+
+        Opening the port resets the Arduino. Instead of a fixed sleep, wait
+        for the first line it prints after boot (its banner); boot_timeout
+        caps the wait for firmware that prints nothing.
         
         Args:
             port: Serial port (e.g., "/dev/ttyACM0")
             baud: Baud rate (e.g., 115200)
+            boot_timeout: Max seconds to wait for the boot banner
         """
         self.ser = serial.Serial(
             port=port,
             baudrate=baud,
             timeout=1
         )
-        time.sleep(2)
+        self._t_write = instrumentation.timer("serial.write")
+        self.banner = self.read_line(timeout=boot_timeout)
+        self.boot_lines = set(BOOT_LINES)
+        if self.banner is None:
+            print(f"[WARN] No banner from {port} after {boot_timeout:.1f} s, continuing")
+        else:
+            self.boot_lines.add(self.banner)  # Whatever this firmware prints on reset
         print(f"[OK] Connected to {port} @ {baud}")
 
+    def read_line(self, timeout=1.0):
+        """Read one non-empty line from the Arduino.
+        
+        Args:
+            timeout: Max seconds to wait
+
+        Returns:
+            The stripped line, or None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        saved_timeout = self.ser.timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.ser.timeout = remaining
+                line = self.ser.readline().decode(errors="replace").strip()
+                if line:
+                    return line
+        finally:
+            self.ser.timeout = saved_timeout
+
+    def is_boot_line(self, line: str) -> bool:
+        """True for startup output (e.g. the banner after a reset), which is not a reply."""
+        return line in self.boot_lines
+
+    def drain(self):
+        """Discard replies that nobody read."""
+        self.ser.reset_input_buffer()
+
     def send(self, cmd, delay=0.1):
         """Send a command to the Arduino.
         
@@ -31,7 +81,8 @@ class HopperController:
             delay: Delay (seconds) after sending
         """
         print(f">> {cmd}")
-        self.ser.write((cmd + "\n").encode())
+        with self._t_write:
+            self.ser.write((cmd + "\n").encode())
         time.sleep(delay)
 
     def close(self):
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Simulated Hopper Arduino on a Linux pseudo-terminal.
+
+Speaks the same line protocol as the firmware so HopperController, the GUI
+and the CLI modes can run without hardware:
+    h            home (move back to the home position)
+    r <speed>    run away from home at <speed> (firmware speed units)
+    s            stop
+    ?            report state
+
+Each reply is a single line, delivered after a configurable latency. Opening
+the port behaves like an Arduino auto-reset: the motor stops and the banner
+is printed again once the simulated boot time has elapsed. The actuator
+position can optionally be published as mocap UDP packets.
+
+Usage (from the linear_actuator folder):
+    python -m src.arduino_sim --mocap-port 9999
+    python main.py --port <printed pty path>
+"""
+
+import argparse
+import heapq
+import os
+import select
+import socket
+import threading
+import time
+import tty
+from typing import List, Optional, Tuple
+
+from src.arduino_controller import BOOT_LINES
+from src.mocap_receiver import MotionDataBodyFoot
+
+BANNER = BOOT_LINES[0]
+
+
+class SimulatedArduino:
+    """Pty-backed Arduino that models a single linear axis."""
+
+    def __init__(self, latency: float = 0.0, boot_time: float = 0.1,
+                 metres_per_step: float = 1e-5, home_speed: int = 5000, travel: float = 0.2,
+                 mocap_target: Optional[Tuple[str, int]] = None, mocap_rate: float = 100.0,
+                 origin: Tuple[float, float, float] = (0.1535, 0.5191, 0.3607),
+                 tick: float = 0.001, motion_delay: float = 0.0):
+        """Initialize the simulator.
+
+        Args:
+            latency: Delay (seconds) between receiving a command and replying
+            boot_time: Delay (seconds) between port open and banner, like the bootloader
+            metres_per_step: Carriage travel per speed unit per second
+            home_speed: Speed used for homing
+            travel: Usable stroke (metres) from home to the far limit
+            mocap_target: (ip, port) to publish the carriage position to, or None
+            mocap_rate: Mocap publish rate in Hz
+            origin: Mocap position of the carriage at home; motion is along -Y
+            tick: Physics step in seconds
+            motion_delay: Delay (seconds) between a motion command and the carriage moving
+        """
+        self.latency = latency
+        self.boot_time = boot_time
+        self.metres_per_step = metres_per_step
+        self.home_speed = home_speed
+        self.travel = travel
+        self.mocap_target = mocap_target
+        self.mocap_period = 1.0 / mocap_rate
+        self.origin = origin
+        self.tick = tick
+        self.motion_delay = motion_delay
+
+        # Carriage state (metres from home, metres/second)
+        self.position = 0.0
+        self.velocity = 0.0
+        self.state = "idle"  # idle | homing | running
+        self.state_lock = threading.Lock()
+        # (due time, state, velocity) of a motion command waiting out motion_delay
+        self._pending_motion: Optional[Tuple[float, str, float]] = None
+
+        # (receive time, command) for every line received, for benchmarks
+        self.commands: List[Tuple[float, str]] = []
+        # perf_counter time the carriage last started moving
+        self.motion_start_time: Optional[float] = None
+
+        self.master_fd: Optional[int] = None
+        self.port: Optional[str] = None
+        self.stop_flag = False
+        self.sim_thread: Optional[threading.Thread] = None
+        self.mocap_sock: Optional[socket.socket] = None
+
+    def start(self):
+        """Create the pty and start the simulation thread."""
+        self.master_fd, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        self.port = os.ttyname(slave_fd)
+        # Keep no slave fd of our own so a client open/close shows up as POLLHUP changes
+        os.close(slave_fd)
+
+        if self.mocap_target:
+            self.mocap_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        self.stop_flag = False
+        self.sim_thread = threading.Thread(target=self._sim_loop, daemon=True)
+        self.sim_thread.start()
+        print(f"[OK] Simulated Arduino on {self.port}")
+
+    def stop(self):
+        """Stop the simulation and release the pty."""
+        self.stop_flag = True
+        if self.sim_thread and self.sim_thread.is_alive():
+            self.sim_thread.join()
+        if self.master_fd is not None:
+            os.close(self.master_fd)
+            self.master_fd = None
+        if self.mocap_sock:
+            self.mocap_sock.close()
+            self.mocap_sock = None
+
+    def get_position(self) -> Tuple[float, float]:
+        """Return (position, velocity) of the carriage."""
+        with self.state_lock:
+            return self.position, self.velocity
+
+    # ===== Protocol =====
+
+    def _handle_command(self, line: str) -> str:
+        """Apply one command and return the reply line."""
+        parts = line.split()
+        if not parts:
+            return ""
+        cmd = parts[0]
+        with self.state_lock:
+            if cmd == "h":
+                if self.position > 0.0:
+                    self._command_motion("homing", -self.home_speed * self.metres_per_step)
+                return "Homing"
+            if cmd == "r":
+                try:
+                    speed = int(parts[1])
+                except (IndexError, ValueError):
+                    return "ERR bad speed"
+                self._command_motion("running", speed * self.metres_per_step)
+                return f"Run {speed}"
+            if cmd == "s":
+                self._pending_motion = None
+                self.state = "idle"
+                self.velocity = 0.0
+                return "Stopped"
+            if cmd == "?":
+                return f"state={self.state} pos={self.position:.5f} vel={self.velocity:.5f}"
+        return f"ERR unknown command: {line}"
+
+    def _command_motion(self, state: str, velocity: float):
+        """Start moving now, or after motion_delay. Caller holds state_lock."""
+        if self.motion_delay > 0.0:
+            self._pending_motion = (time.perf_counter() + self.motion_delay, state, velocity)
+            return
+        self.state = state
+        self.velocity = velocity
+        if velocity != 0.0:
+            self.motion_start_time = time.perf_counter()
+
+    def _step(self, dt: float):
+        """Advance the carriage model by dt seconds."""
+        with self.state_lock:
+            if self._pending_motion and time.perf_counter() >= self._pending_motion[0]:
+                due, self.state, self.velocity = self._pending_motion
+                self._pending_motion = None
+                self.motion_start_time = due
+            if self.velocity == 0.0:
+                return
+            self.position += self.velocity * dt
+            if self.state == "homing" and self.position <= 0.0:
+                self.position = 0.0
+                self.velocity = 0.0
+                self.state = "idle"
+            elif self.position >= self.travel:
+                self.position = self.travel
+                self.velocity = 0.0
+                self.state = "idle"
+
+    def _publish_mocap(self):
+        with self.state_lock:
+            y = self.origin[1] - self.position
+        data = MotionDataBodyFoot(self.origin[0], y, self.origin[2], self.origin[0], y, self.origin[2])
+        try:
+            self.mocap_sock.sendto(data.to_marker_bytes(), self.mocap_target)
+        except OSError:
+            pass
+
+    # ===== Main loop =====
+
+    def _sim_loop(self):
+        """Background thread: serial I/O, reply scheduling, physics and mocap."""
+        poller = select.poll()
+        poller.register(self.master_fd, select.POLLIN)
+        connected = False
+        pending: List[Tuple[float, int, str]] = []  # (due time, seq, reply) heap
+        reply_seq = 0
+        rx = b""
+        now = time.perf_counter()
+        last_step = now
+        next_mocap = now
+
+        while not self.stop_flag:
+            now = time.perf_counter()
+            self._step(now - last_step)
+            last_step = now
+
+            if self.mocap_sock and now >= next_mocap:
+                self._publish_mocap()
+                next_mocap += self.mocap_period
+                if next_mocap < now:
+                    next_mocap = now + self.mocap_period
+
+            while connected and pending and pending[0][0] <= now:
+                _, _, reply = heapq.heappop(pending)
+                try:
+                    os.write(self.master_fd, (reply + "\r\n").encode())
+                except OSError:
+                    pass
+
+            timeout = self.tick
+            if pending:
+                timeout = min(timeout, max(0.0, pending[0][0] - now))
+            events = poller.poll(timeout * 1000)
+            revents = events[0][1] if events else 0
+
+            if revents & select.POLLHUP:
+                # No client has the port open
+                if connected:
+                    connected = False
+                    pending.clear()
+                    rx = b""
+                time.sleep(self.tick)
+                continue
+
+            if not connected:
+                # Client opened the port: DTR reset stops the motor and reboots
+                connected = True
+                with self.state_lock:
+                    self.state = "idle"
+                    self.velocity = 0.0
+                    self._pending_motion = None
+                heapq.heappush(pending, (time.perf_counter() + self.boot_time, reply_seq, BANNER))
+                reply_seq += 1
+
+            if revents & select.POLLIN:
+                try:
+                    chunk = os.read(self.master_fd, 1024)
+                except OSError:
+                    continue
+                rx += chunk
+                while b"\n" in rx:
+                    raw, rx = rx.split(b"\n", 1)
+                    line = raw.decode(errors="replace").strip()
+                    received = time.perf_counter()
+                    self.commands.append((received, line))
+                    reply = self._handle_command(line)
+                    if reply:
+                        heapq.heappush(pending, (received + self.latency, reply_seq, reply))
+                        reply_seq += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated Hopper Arduino on a pty")
+    parser.add_argument("--latency", type=float, default=0.0, help="Reply latency in seconds (default: 0)")
+    parser.add_argument("--boot-time", type=float, default=0.1, help="Seconds from port open to banner (default: 0.1)")
+    parser.add_argument("--motion-delay", type=float, default=0.0,
+                        help="Seconds from a motion command to the carriage moving (default: 0)")
+    parser.add_argument("--mocap-ip", default="127.0.0.1", help="Mocap destination IP (default: 127.0.0.1)")
+    parser.add_argument("--mocap-port", type=int, help="Publish carriage position as mocap UDP to this port")
+    parser.add_argument("--mocap-rate", type=float, default=100.0, help="Mocap publish rate in Hz (default: 100)")
+    args = parser.parse_args()
+
+    target = (args.mocap_ip, args.mocap_port) if args.mocap_port else None
+    sim = SimulatedArduino(latency=args.latency, boot_time=args.boot_time,
+                           mocap_target=target, mocap_rate=args.mocap_rate, motion_delay=args.motion_delay)
+    sim.start()
+    print("Press CTRL-C to exit")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        sim.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Lightweight hot-path instrumentation for the linear actuator app.
+
+Named timers and counters with fixed-memory log-scale histograms. Call
+sites look their timers up once (usually in __init__) and time blocks with
+``with self._t_render:``. While instrumentation is disabled, timer() and
+counter() hand out shared no-op objects, so the cost on the hot path is a
+trivial method call.
+
+Instrumentation must be enabled before the instrumented objects are
+created, e.g. in main() right after argument parsing:
+
+    instrumentation.enable()
+    instrumentation.install_signal_dump("stats.json")   # kill -USR1 <pid>
+"""
+
+import json
+import math
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter as _StackCounter
+from typing import Dict, List, Optional
+
+# Histogram layout: SUB buckets per power of two, starting at 1 microsecond
+SUB = 4
+OCTAVES = 32       # 1 us .. ~70 min
+MIN_VALUE = 1e-6
+
+_enabled = False
+
+
+class Histogram:
+    """Fixed-size log-scale histogram of durations in seconds."""
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (OCTAVES * SUB + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.buckets[self._index(value)] += 1
+
+    @staticmethod
+    def _index(value: float) -> int:
+        if value <= MIN_VALUE:
+            return 0
+        mantissa, exponent = math.frexp(value / MIN_VALUE)  # mantissa in [0.5, 1)
+        idx = (exponent - 1) * SUB + int((mantissa - 0.5) * 2 * SUB) + 1
+        return min(idx, OCTAVES * SUB)
+
+    @staticmethod
+    def _upper_bound(idx: int) -> float:
+        if idx == 0:
+            return MIN_VALUE
+        octave, sub = divmod(idx - 1, SUB)
+        return MIN_VALUE * 2 ** octave * (1 + (sub + 1) / SUB)
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile (bucket upper bound, clamped to the observed max)."""
+        if self.count == 0:
+            return float("nan")
+        target = pct / 100.0 * self.count
+        seen = 0
+        for idx, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return min(self._upper_bound(idx), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Durations in milliseconds."""
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class Timer:
+    """Context manager that records elapsed wall time into a histogram.
+
+    Timers are shared by name, so start times are kept per thread (as a
+    stack, which also allows nesting the same timer).
+    """
+
+    __slots__ = ("name", "hist", "_local")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hist = Histogram()
+        self._local = threading.local()
+
+    def __enter__(self):
+        starts = getattr(self._local, "starts", None)
+        if starts is None:
+            starts = self._local.starts = []
+        starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(time.perf_counter() - self._local.starts.pop())
+        return False
+
+    def record(self, seconds: float):
+        """Record a duration measured elsewhere (e.g. an inter-arrival interval)."""
+        self.hist.record(seconds)
+
+
+class Counter:
+    """Monotonic event counter."""
+
+    __slots__ = ("name", "value")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+
+    def inc(self, n: int = 1):
+        self.value += n
+
+
+class _NullTimer:
+    """Shared no-op stand-in used while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def record(self, seconds: float):
+        pass
+
+    def inc(self, n: int = 1):
+        pass
+
+
+NULL = _NullTimer()
+
+_timers: Dict[str, Timer] = {}
+_counters: Dict[str, Counter] = {}
+_registry_lock = threading.Lock()
+
+
+def enable():
+    """Turn instrumentation on for objects created from now on."""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def timer(name: str):
+    """Get (or create) the named timer, or a no-op when disabled."""
+    if not _enabled:
+        return NULL
+    with _registry_lock:
+        if name not in _timers:
+            _timers[name] = Timer(name)
+        return _timers[name]
+
+
+def counter(name: str):
+    """Get (or create) the named counter, or a no-op when disabled."""
+    if not _enabled:
+        return NULL
+    with _registry_lock:
+        if name not in _counters:
+            _counters[name] = Counter(name)
+        return _counters[name]
+
+
+def snapshot() -> dict:
+    """Current timer and counter values as a JSON-serializable dict."""
+    with _registry_lock:
+        timers = list(_timers.values())
+        counters = list(_counters.values())
+    return {
+        "timestamp": time.time(),
+        "timers": {t.name: t.hist.summary() for t in sorted(timers, key=lambda t: t.name)},
+        "counters": {c.name: c.value for c in sorted(counters, key=lambda c: c.name)},
+    }
+
+
+def dump_json(path: str):
+    """Write snapshot() to path."""
+    with open(path, 'w') as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+def install_signal_dump(path: str, signum: int = signal.SIGUSR1):
+    """Dump stats to path whenever the process receives signum.
+
+    The handler only wakes a helper thread: it runs on the main thread, which
+    may be holding _registry_lock inside timer() or counter() at that moment.
+    """
+    requested = threading.Event()
+
+    def dump_loop():
+        while True:
+            requested.wait()
+            requested.clear()
+            dump_json(path)
+
+    threading.Thread(target=dump_loop, name="stats-dump", daemon=True).start()
+    signal.signal(signum, lambda *_: requested.set())
+
+
+# ===== Sampling profiler =====
+
+class SamplingProfiler:
+    """Periodically samples the stacks of all threads.
+
+    Output is in collapsed-stack format ("thread;frame;frame count"), which
+    flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, hz: float = 200.0):
+        self.interval = 1.0 / hz
+        self.stacks = _StackCounter()
+        self.samples = 0
+        self.stop_flag = False
+        self.sample_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.stop_flag = False
+        self.sample_thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self.sample_thread.start()
+
+    def stop(self):
+        self.stop_flag = True
+        if self.sample_thread and self.sample_thread.is_alive():
+            self.sample_thread.join()
+
+    def write_collapsed(self, path: str):
+        with open(path, 'w') as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self.stop_flag:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
@@ -4,7 +4,17 @@
 import socket
 import threading
 import struct
+import time
 from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+try:
+    from src import instrumentation
+except ImportError:  # Run directly, e.g. python src/mocap_receiver.py
+    import instrumentation
+
+# CSV layout of recorded sessions (the GUI recorder and the supervisor's mocap worker)
+RECORD_HEADER = "timestamp,body_x,body_y,body_z,foot_x,foot_y,foot_z"
 
 
 @dataclass
@@ -23,6 +33,10 @@ class MotionDataBodyFoot:
                           self.body_x, self.body_y, self.body_z,
                           self.foot_x, self.foot_y, self.foot_z)
 
+    def to_marker_bytes(self) -> bytes:
+        """Pack body position to 12 bytes (3 floats) - the wire format accepted by MocapReceiver."""
+        return struct.pack('fff', self.body_x, self.body_y, self.body_z)
+
     @classmethod
     def from_bytes(cls, data: bytes) -> 'MotionDataBodyFoot':
         """Unpack from 12 bytes (3 floats) - single marker position for both body and foot."""
@@ -52,6 +66,10 @@ class MocapReceiver:
         self.data_mutex = threading.Lock()
         self.sockfd: Optional[socket.socket] = None
         self.recv_thread: Optional[threading.Thread] = None
+        self.packet_count = 0    # Valid 12-byte packets received
+        self.rejected_count = 0  # Datagrams of any other size
+        self.listeners: List[Callable[[float, MotionDataBodyFoot], None]] = []
+        self._t_packet = instrumentation.timer("mocap.packet")
 
     def start(self):
         """Start listening for UDP packets."""
@@ -87,6 +105,14 @@ class MocapReceiver:
             self.sockfd.close()
             self.sockfd = None
 
+    def add_listener(self, callback: Callable[[float, MotionDataBodyFoot], None]):
+        """Call callback(t, data) from the receive thread for every valid packet.
+
+        t is time.perf_counter() right after the datagram was read. Keep the
+        callback short: it delays the next recvfrom().
+        """
+        self.listeners.append(callback)
+
     def has_data(self) -> bool:
         """Check if motion data has been received."""
         return self.data_received
@@ -103,6 +129,7 @@ class MocapReceiver:
         while not self.stop_flag:
             try:
                 bytes_received, sender = self.sockfd.recvfrom_into(buffer)
+                received = time.perf_counter()
 
                 if bytes_received < 0:
                     if self.stop_flag:
@@ -111,14 +138,20 @@ class MocapReceiver:
                     continue
 
                 if bytes_received == 12:  # Exactly 12 bytes for single marker (3 floats)
-                    motion_data = MotionDataBodyFoot.from_bytes(buffer[:12])
+                    with self._t_packet:
+                        motion_data = MotionDataBodyFoot.from_bytes(buffer[:12])
 
-                    with self.data_mutex:
-                        self.latest_data = motion_data
-                    self.data_received = True
+                        with self.data_mutex:
+                            self.latest_data = motion_data
+                        self.data_received = True
+                        self.packet_count += 1
+                        for callback in self.listeners:
+                            callback(received, motion_data)
 
                     # Optional debug print
                     # print(f"Received data: body=({motion_data.body_x:.2f}, {motion_data.body_y:.2f}, {motion_data.body_z:.2f})")
+                elif bytes_received > 0:  # 0 bytes: woken by shutdown() in stop()
+                    self.rejected_count += 1
 
             except OSError:
                 if not self.stop_flag:
@@ -133,7 +166,6 @@ if __name__ == '__main__':
 
     try:
         print("Waiting for mocap data...")
-        import time
         while not receiver.has_data():
             time.sleep(0.1)
 
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Replay recorded mocap sessions through the live UDP pipeline.
+
+Reads a CSV written by the GUI recorder (``mocap_data/linear_actuator_*.csv``)
+and streams it to a MocapReceiver as 12-byte marker datagrams, so receiver,
+recorder, estimators and GUI can be exercised without the mocap system.
+
+Usage (from the linear_actuator folder):
+    python -m src.replay mocap_data/linear_actuator_20260109_175352.csv --speed 2
+"""
+
+import argparse
+import csv
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.mocap_receiver import MotionDataBodyFoot
+from src.segmented_recorder import iter_rows, load_manifest
+
+
+@dataclass
+class ReplayFrame:
+    """One recorded sample, timed relative to the start of the session."""
+    t: float
+    data: MotionDataBodyFoot
+
+
+def load_session(path) -> List[ReplayFrame]:
+    """Load a recorded session CSV.
+
+    Args:
+        path: CSV with header timestamp,body_x,body_y,body_z,foot_x,foot_y,foot_z,
+            or a segmented session directory written with --segment-seconds/--compress
+
+    Returns:
+        Frames with ``t`` in seconds since the first row.
+    """
+    frames = []
+    t0 = None
+    for row in csv.DictReader(_session_lines(path)):
+        ts = datetime.fromisoformat(row["timestamp"]).timestamp()
+        if t0 is None:
+            t0 = ts
+        data = MotionDataBodyFoot(
+            float(row["body_x"]), float(row["body_y"]), float(row["body_z"]),
+            float(row["foot_x"]), float(row["foot_y"]), float(row["foot_z"]))
+        frames.append(ReplayFrame(ts - t0, data))
+    return frames
+
+
+def _session_lines(path):
+    """Yield the CSV lines of a single-file or segmented session, header first."""
+    if Path(path).is_dir():
+        yield load_manifest(path)["header"] + "\n"
+        yield from iter_rows(path)
+    else:
+        with open(path, newline='') as f:
+            yield from f
+
+
+class ManualClock:
+    """Deterministic clock for tests: sleep() advances time instantly."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.now += seconds
+
+
+class SessionReplayer:
+    """Stream recorded frames as UDP datagrams in the receiver's wire format."""
+
+    def __init__(self, frames: List[ReplayFrame], ip: str = "127.0.0.1", port: int = 9999,
+                 speed: float = 1.0, jitter: float = 0.0, loops: int = 1,
+                 clock: Optional[Callable[[], float]] = None,
+                 sleep: Optional[Callable[[float], None]] = None,
+                 seed: Optional[int] = None):
+        """Initialize the replayer.
+
+        Args:
+            frames: Frames from load_session()
+            ip: Destination IP of the MocapReceiver
+            port: Destination UDP port
+            speed: Playback rate (1.0 = real time, N = N x faster, 0 = as fast as possible)
+            jitter: Std-dev (seconds) of Gaussian noise added to each send time
+            loops: Number of passes over the session (0 = forever)
+            clock: Time source in seconds (default: time.perf_counter)
+            sleep: Sleep function matching clock (default: time.sleep)
+            seed: Seed for the jitter generator (for reproducible runs)
+        """
+        if not frames:
+            raise ValueError("No frames to replay")
+        if speed < 0:
+            raise ValueError(f"Speed must be >= 0, got {speed}")
+        self.frames = frames
+        self.target = (ip, port)
+        self.speed = speed
+        self.jitter = jitter
+        self.loops = loops
+        self.clock = clock or time.perf_counter
+        self.sleep = sleep or time.sleep
+        self.rng = random.Random(seed)
+
+        self.stop_flag = False
+        self.frames_sent = 0
+        self.max_lateness = 0.0
+        self.sockfd: Optional[socket.socket] = None
+        self.replay_thread: Optional[threading.Thread] = None
+
+        # Session duration plus one mean frame interval, so loops stay evenly spaced
+        duration = frames[-1].t
+        self.loop_period = duration + (duration / (len(frames) - 1) if len(frames) > 1 else 0.0)
+
+    def run(self):
+        """Replay the session in the calling thread until done or stopped."""
+        self.stop_flag = False
+        self.sockfd = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            start = self.clock()
+            loop = 0
+            while not self.stop_flag and (self.loops == 0 or loop < self.loops):
+                loop_start = loop * self.loop_period
+                for frame in self.frames:
+                    if self.stop_flag:
+                        break
+                    if self.speed > 0:
+                        self._wait_until(start + (loop_start + frame.t) / self.speed + self._jitter())
+                    self.sockfd.sendto(frame.data.to_marker_bytes(), self.target)
+                    self.frames_sent += 1
+                loop += 1
+        finally:
+            self.sockfd.close()
+            self.sockfd = None
+
+    def start(self):
+        """Replay in a background thread."""
+        self.replay_thread = threading.Thread(target=self.run, daemon=True)
+        self.replay_thread.start()
+
+    def stop(self):
+        """Stop a running replay."""
+        self.stop_flag = True
+        if self.replay_thread and self.replay_thread.is_alive():
+            self.replay_thread.join()
+
+    def _jitter(self) -> float:
+        return self.rng.gauss(0.0, self.jitter) if self.jitter > 0 else 0.0
+
+    def _wait_until(self, deadline: float):
+        """Sleep until deadline; schedule is absolute so delays never accumulate."""
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+        else:
+            self.max_lateness = max(self.max_lateness, -remaining)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded mocap session over UDP")
+    parser.add_argument("session", type=Path,
+                        help="Recorded CSV or segmented session directory (mocap_data/linear_actuator_*)")
+    parser.add_argument("--ip", default="127.0.0.1", help="Receiver IP (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=9999, help="Receiver UDP port (default: 9999)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Playback rate: 1 = real time, N = N x faster (default: 1)")
+    parser.add_argument("--fast", action="store_true", help="Send as fast as possible (ignore timing)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Send-time jitter std-dev in seconds")
+    parser.add_argument("--loops", type=int, default=1, help="Number of passes, 0 = forever (default: 1)")
+    parser.add_argument("--seed", type=int, help="Jitter seed for reproducible runs")
+    args = parser.parse_args()
+
+    frames = load_session(args.session)
+    replayer = SessionReplayer(frames, ip=args.ip, port=args.port,
+                               speed=0.0 if args.fast else args.speed,
+                               jitter=args.jitter, loops=args.loops, seed=args.seed)
+    print(f"Replaying {len(frames)} frames ({frames[-1].t:.2f} s) to {args.ip}:{args.port} ...")
+
+    t_start = time.perf_counter()
+    try:
+        replayer.run()
+    except KeyboardInterrupt:
+        print("\n[CTRL-C]")
+    elapsed = time.perf_counter() - t_start
+    print(f"[OK] Sent {replayer.frames_sent} frames in {elapsed:.2f} s "
+          f"(max lateness {replayer.max_lateness * 1000:.2f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Segmented, background-compressed CSV recording for long sessions.
+
+A session is a directory of CSV segments plus manifest.json:
+
+    linear_actuator_20260109_175352/
+        manifest.json
+        segment_0000.csv.gz
+        segment_0001.csv.gz
+        segment_0002.csv        <- still being written
+
+The writer rolls over to a new segment when the current one exceeds a time
+span or raw size. Closed segments are compressed (gzip via zlib, or xz via
+lzma) by a low-priority worker thread, so the acquisition thread only ever
+does buffered plain writes. The manifest lists every closed segment with its
+time range, so readers can open just the segments they need.
+
+Opening a recorder on an existing session directory continues it: segment
+numbering carries on, a segment left open by a killed writer is added to
+the manifest (without a time range) and unfinished compression is redone.
+"""
+
+import gzip
+import json
+import lzma
+import os
+import queue
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+MANIFEST = "manifest.json"
+COMPRESSED_SUFFIX = {"zlib": ".gz", "lzma": ".xz"}
+CHUNK = 1 << 16
+
+
+class SegmentedRecorder:
+    """Write CSV rows into time/size-bounded segments of a session directory."""
+
+    def __init__(self, session_dir, header: str, max_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None, compression: Optional[str] = "zlib",
+                 level: Optional[int] = None, flush_interval: float = 1.0):
+        """Initialize the recorder and open the first segment.
+
+        Args:
+            session_dir: Directory for segments and manifest (created if missing)
+            header: CSV header line (without newline), repeated in every segment
+            max_seconds: Roll over when a segment spans this many seconds
+            max_bytes: Roll over when a segment reaches this many raw bytes
+            compression: "zlib" (.csv.gz), "lzma" (.csv.xz) or None
+            level: Compression level / preset (default: library default)
+            flush_interval: Seconds between flushes of the open segment
+        """
+        if compression not in (None, "zlib", "lzma"):
+            raise ValueError(f"Unknown compression: {compression}")
+        self.session_dir = Path(session_dir)
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        self.header = header
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.level = level
+        self.flush_interval = flush_interval
+
+        self.segments: List[dict] = []
+        self.manifest_lock = threading.Lock()
+        self.compress_queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self.compress_thread: Optional[threading.Thread] = None
+        if compression:
+            self.compress_thread = threading.Thread(target=self._compress_loop, daemon=True)
+            self.compress_thread.start()
+
+        self._file = None
+        self._segment: Optional[dict] = None
+        self._last_flush = 0.0
+        self._resume()
+        self._open_segment()
+
+    def write_row(self, t: float, line: str):
+        """Append one CSV line (with trailing newline) sampled at time t (epoch seconds)."""
+        seg = self._segment
+        if seg["rows"] and ((self.max_seconds and t - seg["t_start"] >= self.max_seconds) or
+                            (self.max_bytes and seg["raw_bytes"] >= self.max_bytes)):
+            self._close_segment()
+            self._open_segment()
+            seg = self._segment
+        if not seg["rows"]:
+            seg["t_start"] = t
+        seg["t_end"] = t
+        seg["rows"] += 1
+        seg["raw_bytes"] += len(line)
+        self._file.write(line)
+        if t - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = t
+
+    def close(self):
+        """Close the open segment and wait for pending compression."""
+        if self._file is None:
+            return
+        if self._segment["rows"]:
+            self._close_segment()
+        else:
+            # Nothing written since the last rollover: drop the header-only file
+            self._file.close()
+            (self.session_dir / self._segment["file"]).unlink()
+            with self.manifest_lock:
+                self._write_manifest()
+        self._file = None
+        if self.compress_thread:
+            self.compress_queue.put(None)
+            self.compress_thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # ===== Segments =====
+
+    def _resume(self):
+        """Continue an existing session in session_dir, if there is one."""
+        if (self.session_dir / MANIFEST).exists():
+            self.segments = load_manifest(self.session_dir)["segments"]
+        orphan = self.session_dir / f"segment_{len(self.segments):04d}.csv"
+        if orphan.exists():
+            # Open segment of a writer that was killed: keep what reached the disk
+            with open(orphan, 'rb') as f:
+                rows = sum(1 for _ in f) - 1
+            if rows > 0:
+                size = orphan.stat().st_size
+                self.segments.append({"file": orphan.name, "t_start": None, "t_end": None, "rows": rows,
+                                      "raw_bytes": size - len(self.header) - 1, "bytes": size,
+                                      "recovered": True})
+            else:
+                orphan.unlink()
+        if not self.segments:
+            return
+        with self.manifest_lock:
+            self._write_manifest()
+        for seg in self.segments:
+            path = self.session_dir / seg["file"]
+            if seg["file"].endswith(".csv"):
+                if self.compression and path.exists():
+                    self.compress_queue.put(seg)
+            else:
+                # Compressed copy is in the manifest; the plain file outlived its unlink
+                plain = path.with_suffix("")
+                if plain.exists():
+                    plain.unlink()
+
+    def _open_segment(self):
+        name = f"segment_{len(self.segments):04d}.csv"
+        self._segment = {"file": name, "t_start": None, "t_end": None, "rows": 0,
+                         "raw_bytes": 0, "bytes": None}
+        self._file = open(self.session_dir / name, 'w')
+        self._file.write(self.header + "\n")
+
+    def _close_segment(self):
+        self._file.close()
+        seg = self._segment
+        seg["bytes"] = (self.session_dir / seg["file"]).stat().st_size
+        with self.manifest_lock:
+            self.segments.append(seg)
+            self._write_manifest()
+        if self.compression:
+            self.compress_queue.put(seg)
+
+    def _write_manifest(self):
+        """Atomically rewrite the manifest (caller holds manifest_lock)."""
+        manifest = {
+            "header": self.header,
+            "compression": self.compression,
+            "max_seconds": self.max_seconds,
+            "max_bytes": self.max_bytes,
+            "segments": self.segments,
+        }
+        tmp = self.session_dir / (MANIFEST + ".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.session_dir / MANIFEST)
+
+    # ===== Compression worker =====
+
+    def _compress_loop(self):
+        """Background thread: compress closed segments, oldest first."""
+        # Drop a real-time policy inherited from the creating thread, then lower the
+        # nice value (Linux applies both per thread) to stay out of acquisition's way.
+        # Separate attempts: either may be refused without affecting the other.
+        try:
+            os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+        except (AttributeError, OSError):
+            pass
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            seg = self.compress_queue.get()
+            if seg is None:
+                break
+            try:
+                self._compress_segment(seg)
+            except OSError as e:
+                print(f"[WARN] Compressing {seg['file']} failed: {e}")
+
+    def _compress_segment(self, seg: dict):
+        src = self.session_dir / seg["file"]
+        dst = src.with_name(src.name + COMPRESSED_SUFFIX[self.compression])
+        if self.compression == "zlib":
+            level = self.level if self.level is not None else zlib.Z_DEFAULT_COMPRESSION
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        else:
+            compressor = lzma.LZMACompressor(preset=self.level)
+        with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+            while True:
+                chunk = fin.read(CHUNK)
+                if not chunk:
+                    break
+                fout.write(compressor.compress(chunk))
+            fout.write(compressor.flush())
+        with self.manifest_lock:
+            seg["file"] = dst.name
+            seg["bytes"] = dst.stat().st_size
+            self._write_manifest()
+        src.unlink()
+
+
+# ===== Readers =====
+
+def load_manifest(session_dir) -> dict:
+    with open(Path(session_dir) / MANIFEST) as f:
+        return json.load(f)
+
+
+def open_segment(path):
+    """Open a plain, .gz or .xz segment for text reading."""
+    path = str(path)
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rt')
+    if path.endswith(".xz"):
+        return lzma.open(path, 'rt')
+    return open(path)
+
+
+def iter_rows(session_dir, t_start: Optional[float] = None, t_end: Optional[float] = None) -> Iterator[str]:
+    """Yield CSV lines (without header) from segments overlapping [t_start, t_end].
+
+    Filtering is per segment; rows inside an overlapping segment are not trimmed.
+    """
+    session_dir = Path(session_dir)
+    for seg in load_manifest(session_dir)["segments"]:
+        if t_start is not None and seg["t_end"] is not None and seg["t_end"] < t_start:
+            continue
+        if t_end is not None and seg["t_start"] is not None and seg["t_start"] > t_end:
+            continue
+        with open_segment(session_dir / seg["file"]) as f:
+            next(f, None)  # Header
+            for line in f:
+                yield line
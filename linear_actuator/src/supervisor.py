@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""Acquisition supervisor: managed worker processes with pinning and watchdog.
+
+Each acquisition component runs in its own process so it is not scheduled
+behind curses, SSH or rsync in one GIL. For every worker the supervisor
+can:
+  - pin it to dedicated cores (os.sched_setaffinity)
+  - run it under SCHED_FIFO at a given priority and lock its memory
+    (mlockall); both need root or CAP_SYS_NICE / CAP_IPC_LOCK and fall
+    back to normal scheduling with a warning
+  - watch its heartbeat and restart it when it dies or stalls
+  - report wake-up lateness (jitter against its own schedule), CPU use and
+    involuntary context switches
+
+Workers write into their own subdirectory of one session directory through
+SegmentedRecorder, which continues the existing session after a restart.
+
+Built-in worker types:
+    mocap   MocapReceiver -> every packet recorded (options: ip, port)
+    imu     ISM330DHCX polled at rate_hz (options: address, bus, rate_hz)
+    "module:function" for anything else: function(ctx, **options)
+
+Config (JSON):
+    {"session": "mocap_data/session_lab",
+     "workers": [
+        {"name": "mocap", "type": "mocap", "cpus": [2], "rt_priority": 50, "mlock": true, "port": 9999},
+        {"name": "imu_a", "type": "imu", "cpus": [3], "address": "0x6A", "rate_hz": 104}]}
+
+Usage (from the linear_actuator folder):
+    python -m src.supervisor --mocap-cpus 2 --rt-priority 50 --mlock
+    python -m src.supervisor --config supervisor.json
+"""
+
+import argparse
+import ctypes
+import importlib
+import json
+import multiprocessing as mp
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from src.instrumentation import Histogram, OCTAVES, SUB
+from src.mocap_receiver import RECORD_HEADER, MocapReceiver
+from src.segmented_recorder import SegmentedRecorder
+
+IMU_HEADER = "timestamp,ax,ay,az,gx,gy,gz"
+PYTHON_DIR = Path(__file__).resolve().parents[2] / "python"  # Sensor scripts (read_ISM330DHCX2)
+
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+# Shared per-worker stats: fixed slots, then the lateness histogram buckets
+HEARTBEAT, TICKS, LATE_TOTAL, LATE_MIN, LATE_MAX = range(5)
+N_SLOTS = 5
+N_BUCKETS = OCTAVES * SUB + 1
+
+
+@dataclass
+class WorkerSpec:
+    """One managed worker process."""
+    name: str
+    type: str
+    cpus: Optional[List[int]] = None
+    rt_priority: Optional[int] = None
+    mlock: bool = False
+    heartbeat_timeout: float = 2.0
+    startup_timeout: float = 10.0
+    options: Dict = field(default_factory=dict)
+
+
+class WorkerContext:
+    """Handed to the worker function inside the child process."""
+
+    def __init__(self, name: str, session_dir: Path, stop_event, stats, restarts: int):
+        self.name = name
+        self.session_dir = session_dir
+        self.stop_event = stop_event
+        self.stats = stats
+        self.restarts = restarts
+
+    @property
+    def running(self) -> bool:
+        return not self.stop_event.is_set()
+
+    def beat(self):
+        """Tell the supervisor this worker is alive."""
+        self.stats[HEARTBEAT] = time.monotonic()
+
+    def ticks(self, period: float) -> Iterator[float]:
+        """Wake every period seconds on an absolute schedule until stopped.
+
+        Beats on every tick and records how late each wake-up was. Falls
+        back onto the schedule instead of bursting after an overrun.
+        """
+        due = time.monotonic()
+        while self.running:
+            due += period
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.monotonic()
+            self._record_lateness(max(0.0, now - due))
+            self.beat()
+            if now - due > period:
+                due = now
+            yield now
+
+    def _record_lateness(self, late: float):
+        s = self.stats
+        s[TICKS] += 1
+        s[LATE_TOTAL] += late
+        if late < s[LATE_MIN]:
+            s[LATE_MIN] = late
+        if late > s[LATE_MAX]:
+            s[LATE_MAX] = late
+        s[N_SLOTS + Histogram._index(late)] += 1
+
+
+# ===== Built-in workers =====
+
+def mocap_worker(ctx: WorkerContext, ip: str = "0.0.0.0", port: int = 9999, check_period: float = 0.01,
+                 segment_seconds: float = 60.0, compression: Optional[str] = "zlib"):
+    """Record every mocap packet; exits (and gets restarted) if the receive thread dies."""
+    with SegmentedRecorder(ctx.session_dir, RECORD_HEADER, max_seconds=segment_seconds,
+                           compression=compression) as rec:
+        def on_packet(t, data):
+            now = datetime.now()
+            rec.write_row(now.timestamp(), f"{now.isoformat()},{data.body_x},{data.body_y},{data.body_z},"
+                                           f"{data.foot_x},{data.foot_y},{data.foot_z}\n")
+
+        receiver = MocapReceiver(ip, port)
+        receiver.add_listener(on_packet)
+        receiver.start()
+        if receiver.recv_thread is None:
+            raise RuntimeError(f"Could not bind {ip}:{port}")
+        try:
+            for _ in ctx.ticks(check_period):
+                if not receiver.recv_thread.is_alive():
+                    raise RuntimeError("Mocap receive thread died")
+        finally:
+            receiver.stop()
+
+
+def imu_worker(ctx: WorkerContext, address=0x6A, bus: int = 1, rate_hz: float = 104.0,
+               segment_seconds: float = 60.0, compression: Optional[str] = "zlib"):
+    """Poll one ISM330DHCX at rate_hz and record accel (mg) and gyro (mdps)."""
+    sys.path.insert(0, str(PYTHON_DIR))
+    import qwiic_i2c
+    from read_ISM330DHCX2 import init_imu
+
+    address = int(address, 0) if isinstance(address, str) else address
+    imu = init_imu(address, i2c_driver=qwiic_i2c.getI2CDriver(iBus=bus))
+    with SegmentedRecorder(ctx.session_dir, IMU_HEADER, max_seconds=segment_seconds,
+                           compression=compression) as rec:
+        for _ in ctx.ticks(1.0 / rate_hz):
+            if imu.check_status():
+                a = imu.get_accel()
+                g = imu.get_gyro()
+                t = time.time()
+                rec.write_row(t, f"{t},{a.xData},{a.yData},{a.zData},{g.xData},{g.yData},{g.zData}\n")
+
+
+WORKER_TYPES: Dict[str, Callable] = {"mocap": mocap_worker, "imu": imu_worker}
+
+
+def _resolve(worker_type: str) -> Callable:
+    if worker_type in WORKER_TYPES:
+        return WORKER_TYPES[worker_type]
+    module, _, func = worker_type.partition(":")
+    if not func:
+        raise ValueError(f"Unknown worker type: {worker_type}")
+    return getattr(importlib.import_module(module), func)
+
+
+# ===== Child process setup =====
+
+def _apply_realtime(spec: WorkerSpec):
+    """Pin, raise priority and lock memory as far as permissions allow."""
+    if spec.cpus:
+        os.sched_setaffinity(0, spec.cpus)
+    if spec.rt_priority:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(spec.rt_priority))
+        except (AttributeError, OSError) as e:
+            print(f"[WARN] {spec.name}: SCHED_FIFO {spec.rt_priority} not applied ({e})")
+    if spec.mlock:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+            print(f"[WARN] {spec.name}: mlockall failed ({os.strerror(ctypes.get_errno())})")
+
+
+def _worker_main(spec: WorkerSpec, session_dir: Path, stop_event, stats, restarts: int):
+    """Child process entry point."""
+    # Ctrl-C reaches the whole process group; only the supervisor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    _apply_realtime(spec)  # Before the worker starts threads, so they inherit it
+    ctx = WorkerContext(spec.name, session_dir, stop_event, stats, restarts)
+    ctx.beat()
+    _resolve(spec.type)(ctx, **spec.options)
+
+
+# ===== Supervisor =====
+
+class _ManagedWorker:
+    """Supervisor-side state of one worker."""
+
+    def __init__(self, spec: WorkerSpec):
+        self.spec = spec
+        self.stats = mp.Array('d', N_SLOTS + N_BUCKETS, lock=False)
+        self.stats[LATE_MIN] = float("inf")
+        self.process: Optional[mp.Process] = None
+        self.stop_event = mp.Event()
+        self.restarts = 0
+        self.started = 0.0
+        self.last_exit: Optional[str] = None
+        self.cpu_prev = (0.0, 0.0)  # (monotonic time, cpu seconds) at the previous report
+        # Restart state machine, advanced by Supervisor.check() without blocking
+        self.kill_at: Optional[float] = None         # Stalled worker was sent SIGTERM; SIGKILL at this time
+        self.stall_reason: Optional[str] = None
+        self.next_restart_at: Optional[float] = None  # Dead worker is respawned at this time
+
+
+class Supervisor:
+    """Start, watch and restart worker processes."""
+
+    def __init__(self, specs: List[WorkerSpec], session_dir, check_interval: float = 0.1,
+                 restart_delay: float = 0.5, max_restarts: Optional[int] = None, kill_after: float = 1.0):
+        """Initialize the supervisor.
+
+        Args:
+            specs: Workers to run
+            session_dir: Session directory; each worker records into session_dir/<name>
+            check_interval: Seconds between watchdog passes
+            restart_delay: Seconds to wait before restarting a failed worker
+            max_restarts: Give up on a worker after this many restarts (None: never)
+            kill_after: Seconds a stalled worker gets to exit after SIGTERM before SIGKILL
+        """
+        self.session_dir = Path(session_dir)
+        self.check_interval = check_interval
+        self.restart_delay = restart_delay
+        self.max_restarts = max_restarts
+        self.kill_after = kill_after
+        self.workers = [_ManagedWorker(spec) for spec in specs]
+        self.stop_flag = False
+
+    def start(self):
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        for worker in self.workers:
+            self._spawn(worker)
+
+    def stop(self, timeout: float = 3.0):
+        """Ask every worker to stop, then terminate the ones that do not."""
+        for worker in self.workers:
+            worker.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            if worker.process:
+                worker.process.join(max(0.0, deadline - time.monotonic()))
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join()
+
+    def run(self, report_every: float = 5.0):
+        """Watchdog loop with periodic status lines, until stop_flag or Ctrl-C."""
+        next_report = time.monotonic() + report_every
+        while not self.stop_flag:
+            self.check()
+            if time.monotonic() >= next_report:
+                next_report += report_every
+                for name, r in self.report().items():
+                    print(f"{name:<10} pid {r['pid']} cpu {r['cpu_percent']:5.1f}% restarts {r['restarts']} "
+                          f"late p50 {r['lateness'].get('p50_ms', 0):.3f} ms p99 {r['lateness'].get('p99_ms', 0):.3f} ms "
+                          f"max {r['lateness'].get('max_ms', 0):.3f} ms nvcsw {r['involuntary_switches']}")
+            time.sleep(self.check_interval)
+
+    def check(self):
+        """One watchdog pass: restart dead or stalled workers.
+
+        Never blocks: terminating a stalled worker and the restart delay are
+        deadlines checked on later passes, so one failing worker does not
+        hold up the heartbeat checks of the others.
+        """
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.next_restart_at is not None:
+                if now >= worker.next_restart_at:
+                    worker.next_restart_at = None
+                    self._spawn(worker)
+                continue
+            proc = worker.process
+            if proc is None:
+                continue
+            if worker.kill_at is not None:
+                if proc.is_alive():
+                    if now >= worker.kill_at:
+                        proc.kill()
+                    continue
+                proc.join()
+                worker.kill_at = None
+                self._schedule_restart(worker, worker.stall_reason)
+                continue
+            if not proc.is_alive():
+                proc.join()
+                self._schedule_restart(worker, f"exited with code {proc.exitcode}")
+                continue
+            timeout = worker.spec.heartbeat_timeout
+            if worker.stats[HEARTBEAT] < worker.started:
+                timeout = worker.spec.startup_timeout
+            if now - max(worker.stats[HEARTBEAT], worker.started) > timeout:
+                proc.terminate()  # Lets a worker that is merely slow close its recorder
+                worker.kill_at = now + self.kill_after
+                worker.stall_reason = f"stalled for more than {timeout:.1f} s"
+
+    def report(self) -> Dict[str, dict]:
+        """Per-worker lateness histogram summary, CPU use and context switches."""
+        out = {}
+        for worker in self.workers:
+            proc = worker.process
+            pid = proc.pid if proc and proc.is_alive() else None
+            cpu_s, nvcsw = _process_cpu(pid) if pid else (0.0, 0)
+            now = time.monotonic()
+            t_prev, cpu_prev = worker.cpu_prev
+            cpu_percent = 100.0 * (cpu_s - cpu_prev) / (now - t_prev) if t_prev and cpu_s >= cpu_prev else 0.0
+            worker.cpu_prev = (now, cpu_s)
+            out[worker.spec.name] = {
+                "pid": pid,
+                "cpus": _affinity(pid) if pid else None,
+                "restarts": worker.restarts,
+                "last_exit": worker.last_exit,
+                "cpu_percent": cpu_percent,
+                "cpu_seconds": cpu_s,
+                "involuntary_switches": nvcsw,
+                "lateness": _lateness_summary(worker.stats),
+            }
+        return out
+
+    def _spawn(self, worker: _ManagedWorker):
+        worker.stop_event.clear()
+        worker.started = time.monotonic()
+        worker.cpu_prev = (0.0, 0.0)
+        worker.process = mp.Process(target=_worker_main, name=f"worker-{worker.spec.name}", daemon=True,
+                                    args=(worker.spec, self.session_dir / worker.spec.name, worker.stop_event,
+                                          worker.stats, worker.restarts))
+        worker.process.start()
+        print(f"[OK] Worker {worker.spec.name} started (pid {worker.process.pid}, cpus {worker.spec.cpus})")
+
+    def _schedule_restart(self, worker: _ManagedWorker, reason: str):
+        worker.last_exit = reason
+        if self.max_restarts is not None and worker.restarts >= self.max_restarts:
+            print(f"[ERROR] Worker {worker.spec.name} {reason}; restart limit reached")
+            worker.process = None
+            return
+        worker.restarts += 1
+        print(f"[WARN] Worker {worker.spec.name} {reason}; restart #{worker.restarts}")
+        worker.next_restart_at = time.monotonic() + self.restart_delay
+
+
+def _lateness_summary(stats) -> dict:
+    hist = Histogram()
+    hist.count = int(stats[TICKS])
+    hist.total = stats[LATE_TOTAL]
+    hist.min = stats[LATE_MIN]
+    hist.max = stats[LATE_MAX]
+    hist.buckets = [int(n) for n in stats[N_SLOTS:]]
+    return hist.summary()
+
+
+def _affinity(pid: int) -> Optional[List[int]]:
+    """CPUs the process may run on, or None if it has already exited."""
+    try:
+        return sorted(os.sched_getaffinity(pid))
+    except OSError:  # ProcessLookupError
+        return None
+
+
+def _process_cpu(pid: int):
+    """(user + system CPU seconds, involuntary context switches over all threads)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_s = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # utime, stime
+        nvcsw = 0
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/status") as f:
+                for line in f:
+                    if line.startswith("nonvoluntary_ctxt_switches"):
+                        nvcsw += int(line.split()[1])
+        return cpu_s, nvcsw
+    except (OSError, ValueError, IndexError):
+        return 0.0, 0
+
+
+def load_config(path) -> dict:
+    """Read a supervisor config; unknown worker keys become worker options."""
+    with open(path) as f:
+        config = json.load(f)
+    known = {"name", "type", "cpus", "rt_priority", "mlock", "heartbeat_timeout", "startup_timeout"}
+    specs = []
+    for w in config["workers"]:
+        specs.append(WorkerSpec(options={k: v for k, v in w.items() if k not in known},
+                                **{k: v for k, v in w.items() if k in known}))
+    config["workers"] = specs
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supervise acquisition workers")
+    parser.add_argument("--config", help="JSON supervisor config (default: one mocap worker)")
+    parser.add_argument("--session", help="Session directory (default: from config or mocap_data/session_<time>)")
+    parser.add_argument("--mocap-port", type=int, default=9999, help="Mocap UDP port (default: 9999)")
+    parser.add_argument("--mocap-cpus", help="Comma-separated cores for the mocap worker, e.g. 2")
+    parser.add_argument("--rt-priority", type=int, help="SCHED_FIFO priority (1-99) for the default worker")
+    parser.add_argument("--mlock", action="store_true", help="Lock the default worker's memory")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Seconds between status lines (default: 5)")
+    parser.add_argument("--stats-out", help="Write the final per-worker report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.config:
+        config = load_config(args.config)
+    else:
+        cpus = [int(c) for c in args.mocap_cpus.split(",")] if args.mocap_cpus else None
+        config = {"workers": [WorkerSpec("mocap", "mocap", cpus=cpus, rt_priority=args.rt_priority,
+                                         mlock=args.mlock, options={"port": args.mocap_port})]}
+    session = args.session or config.get("session") or \
+        f"mocap_data/session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    supervisor = Supervisor(config["workers"], session)
+    print(f"[OK] Session {session}")
+    supervisor.start()
+    signal.signal(signal.SIGTERM, lambda *_: setattr(supervisor, "stop_flag", True))
+    try:
+        supervisor.run(args.report_every)
+    except KeyboardInterrupt:
+        print("\n[EXIT] Stopping workers.")
+    finally:
+        report = supervisor.report()  # While the workers still have CPU counters to read
+        supervisor.stop()
+        if args.stats_out:
+            with open(args.stats_out, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"[OK] Worker stats written to {args.stats_out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""ADS1115 driver on qwiic_i2c with ALERT/RDY-paced continuous streaming.
+
+Registers are 16-bit big-endian, so they are accessed with 2-byte block
+transfers (the SMBus word calls are little-endian). Constants follow the C++
+driver in ADS1115/ADS1115/include/ADS1115.h.
+
+Streaming runs the ADC in continuous-conversion mode and configures the
+ALERT/RDY pin as a conversion-ready signal (Hi_thresh MSB = 1, Lo_thresh
+MSB = 0). The pin pulses low after every conversion. Each falling edge is
+a GPIO event with a kernel timestamp, and it triggers exactly one 2-byte
+read of the conversion register. The register pointer is left on the
+conversion register, so steady-state reads skip the pointer write. No
+status polling is needed, so 860 SPS is reachable from Python.
+
+Several channels are scanned round-robin: after each multiplexer switch,
+`discard` conversions are dropped unread (the conversion in progress still
+uses the old input) before `keep` conversions are taken. The per-channel
+rate is data_rate / (channels * (discard + keep)).
+
+    adc = ADS1115(0x48, fsr=4.096, data_rate=860)
+    stream = ADS1115Stream(adc, ["AIN0", "AIN1"], GpioReadyPin("gpiochip4", 17))
+    stream.start()
+    times, volts = stream.read_block()      # (block_size, 2) each, epoch seconds and volts
+
+Wiring: ALERT/RDY is open-drain, so it needs a pull-up to 3.3 V.
+Run `python ads1115.py --simulate` to stream from the simulated chip.
+"""
+
+import argparse
+import math
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Register pointers
+CONVERSION = 0b00
+CONFIG = 0b01
+LO_THRESH = 0b10
+HI_THRESH = 0b11
+
+# Config register fields
+OS = 1 << 15
+MODE_SINGLE = 1 << 8
+COMP_QUE_ONE = 0b00      # Assert ALERT/RDY after one conversion
+COMP_QUE_DISABLE = 0b11  # ALERT/RDY high-impedance
+DEFAULT_CFG = 0x0583
+
+MUX = {"AIN0_AIN1": 0b000 << 12, "AIN0_AIN3": 0b001 << 12, "AIN1_AIN3": 0b010 << 12,
+       "AIN2_AIN3": 0b011 << 12, "AIN0": 0b100 << 12, "AIN1": 0b101 << 12,
+       "AIN2": 0b110 << 12, "AIN3": 0b111 << 12}
+FSR = {6.144: 0b000 << 9, 4.096: 0b001 << 9, 2.048: 0b010 << 9, 1.024: 0b011 << 9,
+       0.512: 0b100 << 9, 0.256: 0b101 << 9}
+DATA_RATES = {8: 0b000 << 5, 16: 0b001 << 5, 32: 0b010 << 5, 64: 0b011 << 5,
+              128: 0b100 << 5, 250: 0b101 << 5, 475: 0b110 << 5, 860: 0b111 << 5}
+
+
+def is_valid_address(address: int) -> bool:
+    # ADDR selects the two lowest bits: 0x48 (GND), 0x49 (VDD), 0x4A (SDA), 0x4B (SCL)
+    return (address & ~0b11) == 0x48
+
+
+class ADS1115:
+    """Register-level access to one ADS1115."""
+
+    def __init__(self, address: int = 0x48, i2c_driver=None, fsr: float = 2.048, data_rate: int = 860):
+        """Initialize the driver (no bus traffic).
+
+        Args:
+            address: I2C address (0x48-0x4B)
+            i2c_driver: qwiic_i2c driver, e.g. getI2CDriver(iBus=3); default bus 1
+            fsr: Full-scale range in volts (6.144, 4.096, 2.048, 1.024, 0.512, 0.256)
+            data_rate: Samples per second (8 ... 860)
+        """
+        if not is_valid_address(address):
+            raise ValueError(f"Invalid ADS1115 address 0x{address:02X}")
+        if fsr not in FSR:
+            raise ValueError(f"Unsupported full-scale range {fsr} V, use one of {sorted(FSR)}")
+        if data_rate not in DATA_RATES:
+            raise ValueError(f"Unsupported data rate {data_rate}, use one of {sorted(DATA_RATES)}")
+        if i2c_driver is None:
+            import qwiic_i2c
+            i2c_driver = qwiic_i2c.getI2CDriver()
+        self.address = address
+        self.fsr = fsr
+        self.data_rate = data_rate
+        self._i2c = i2c_driver
+        self._config = DEFAULT_CFG
+        self._pointer: Optional[int] = None  # Register the chip's pointer is known to be on
+
+    def is_connected(self) -> bool:
+        return self._i2c.isDeviceConnected(self.address)
+
+    def read_register(self, reg: int) -> int:
+        msb, lsb = self._i2c.readBlock(self.address, reg, 2)
+        self._pointer = reg
+        return (msb << 8) | lsb
+
+    def write_register(self, reg: int, value: int):
+        self._i2c.writeBlock(self.address, reg, [(value >> 8) & 0xFF, value & 0xFF])
+        self._pointer = reg
+
+    def config_word(self, mux: str, continuous: bool, ready_pin: bool) -> int:
+        """Config register value (comparator active low, non-latching)."""
+        cfg = MUX[mux] | FSR[self.fsr] | DATA_RATES[self.data_rate]
+        if not continuous:
+            cfg |= MODE_SINGLE
+        return cfg | (COMP_QUE_ONE if ready_pin else COMP_QUE_DISABLE)
+
+    def enable_ready_pin(self):
+        """Turn ALERT/RDY into a conversion-ready pulse: Hi_thresh MSB 1, Lo_thresh MSB 0."""
+        self.write_register(HI_THRESH, 0x8000)
+        self.write_register(LO_THRESH, 0x0000)
+
+    def start_continuous(self, mux: str = "AIN0", ready_pin: bool = True):
+        if ready_pin:
+            self.enable_ready_pin()
+        self._config = self.config_word(mux, continuous=True, ready_pin=ready_pin)
+        self.write_register(CONFIG, self._config)
+
+    def set_mux(self, mux: str):
+        """Switch the input, keeping mode and rate; the conversion in progress finishes on the old input."""
+        self._config = (self._config & ~MUX["AIN3"]) | MUX[mux]
+        self.write_register(CONFIG, self._config)
+
+    def read_conversion(self) -> int:
+        """Latest conversion as a signed 16-bit count."""
+        if self._pointer == CONVERSION:
+            msb, lsb = self._i2c.readBlock(self.address, None, 2)  # Pointer already set: read only
+        else:
+            msb, lsb = self._i2c.readBlock(self.address, CONVERSION, 2)
+            self._pointer = CONVERSION
+        raw = (msb << 8) | lsb
+        return raw - 0x10000 if raw & 0x8000 else raw
+
+    def to_volts(self, raw):
+        return raw * (self.fsr / 32768.0)
+
+    def read_single(self, mux: str = "AIN0", timeout: float = 0.5) -> float:
+        """One single-shot conversion in volts (polls the OS bit; for occasional reads)."""
+        self._config = self.config_word(mux, continuous=False, ready_pin=False)
+        self.write_register(CONFIG, self._config | OS)
+        deadline = time.monotonic() + timeout
+        while not self.read_register(CONFIG) & OS:
+            if time.monotonic() > deadline:
+                raise TimeoutError("ADS1115 conversion did not finish")
+            time.sleep(0.2 / self.data_rate)
+        return self.to_volts(self.read_conversion())
+
+    def power_down(self):
+        """Back to single-shot mode (power-down) with the comparator disabled."""
+        self._config = DEFAULT_CFG
+        self.write_register(CONFIG, self._config)
+
+
+# ===== Conversion-ready sources =====
+
+class GpioReadyPin:
+    """ALERT/RDY on a GPIO line, read as falling-edge events (gpiod v1 API)."""
+
+    def __init__(self, chip: str = "gpiochip4", pin: int = 17):
+        import gpiod
+
+        self.chip = gpiod.Chip(chip)
+        self.line = self.chip.get_line(pin)
+        self.line.request(consumer="ads1115", type=gpiod.LINE_REQ_EV_FALLING_EDGE)
+
+    def wait(self, timeout: float) -> List[float]:
+        """Monotonic timestamps of the edges since the last call ([] on timeout)."""
+        sec = int(timeout)
+        if not self.line.event_wait(sec=sec, nsec=int((timeout - sec) * 1e9)):
+            return []
+        return [ev.sec + ev.nsec * 1e-9 for ev in self.line.event_read_multiple()]
+
+    def close(self):
+        self.line.release()
+        self.chip.close()
+
+
+class TimedPacer:
+    """Fallback without ALERT/RDY wired: wake at the nominal data rate.
+
+    The ADC's internal oscillator is only accurate to a few percent, so over
+    time conversions get read twice or skipped. Prefer GpioReadyPin.
+    """
+
+    def __init__(self, rate_hz: float):
+        self.period = 1.0 / rate_hz
+        self.due = None
+
+    def wait(self, timeout: float) -> List[float]:
+        now = time.monotonic()
+        if self.due is None or self.due < now - self.period:
+            self.due = now
+        self.due += self.period
+        if self.due - now > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, self.due - now))
+        return [self.due]
+
+    def close(self):
+        pass
+
+
+# ===== Streaming =====
+
+class ADS1115Stream:
+    """Continuous, ready-paced, round-robin acquisition into NumPy blocks."""
+
+    def __init__(self, adc: ADS1115, channels: Sequence[str] = ("AIN0",), ready=None,
+                 block_size: int = 128, discard: int = 1, keep: int = 1):
+        """Initialize the stream.
+
+        Args:
+            adc: Configured ADS1115
+            channels: Multiplexer inputs to scan, e.g. ["AIN0", "AIN2_AIN3"]
+            ready: GpioReadyPin (or anything with wait(timeout) -> [timestamps]);
+                default TimedPacer at the data rate
+            block_size: Rounds (one sample of every channel) per block
+            discard: Conversions dropped after each multiplexer switch
+            keep: Conversions kept per channel visit (the last one is stored)
+        """
+        for ch in channels:
+            if ch not in MUX:
+                raise ValueError(f"Unknown channel {ch}, use one of {list(MUX)}")
+        self.adc = adc
+        self.channels = list(channels)
+        self.ready = ready or TimedPacer(adc.data_rate)
+        self.block_size = block_size
+        self.discard = discard if len(self.channels) > 1 else 0
+        self.keep = keep
+        self.times = np.full((block_size, len(self.channels)), np.nan)
+        self.volts = np.full((block_size, len(self.channels)), np.nan)
+
+        self.conversions = 0  # Ready edges seen
+        self.discarded = 0    # Dropped for settling after a switch
+        self.missed = 0       # Conversions overwritten before we read them
+        self._channel = 0
+        self._row = 0
+        self._to_discard = 0
+        self._to_keep = keep
+        self._switched_at = 0.0
+        self._epoch_offset = 0.0
+
+    @property
+    def channel_rate(self) -> float:
+        """Nominal samples per second per channel."""
+        return self.adc.data_rate / (len(self.channels) * (self.discard + self.keep))
+
+    def start(self):
+        self._epoch_offset = time.time() - time.monotonic()
+        self._channel = 0
+        self._row = 0
+        self._to_discard = 0
+        self._to_keep = self.keep
+        self._switched_at = 0.0
+        self.adc.start_continuous(self.channels[0], ready_pin=not isinstance(self.ready, TimedPacer))
+
+    def stop(self):
+        self.adc.power_down()
+
+    def read_block(self, timeout: float = 1.0) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Next (times, volts) block, each (block_size, channels); None if the ADC goes quiet.
+
+        Times are epoch seconds of the conversion-ready edges. The arrays are
+        reused for the next block; copy them to keep them.
+        """
+        while True:
+            stamps = self.ready.wait(timeout)
+            if not stamps:
+                return None
+            if self._on_conversions(stamps):
+                return self.times, self.volts
+
+    def _on_conversions(self, stamps: List[float]) -> bool:
+        """Handle ready edges; True when a block is complete."""
+        self.conversions += len(stamps)
+        if stamps[0] <= self._switched_at:
+            # Finished before the switch took effect: old input, and not the one in progress
+            fresh = [t for t in stamps if t > self._switched_at]
+            self.missed += len(stamps) - len(fresh)
+            stamps = fresh
+        n = len(stamps)
+        dropped = min(self._to_discard, n)
+        self._to_discard -= dropped
+        self.discarded += dropped
+        n -= dropped
+        if n == 0:
+            return False  # Settling conversions are never read
+
+        raw = self.adc.read_conversion()
+        self.missed += n - 1  # Only the newest kept conversion is still in the register
+        c, r = self._channel, self._row
+        self.times[r, c] = stamps[-1] + self._epoch_offset
+        self.volts[r, c] = self.adc.to_volts(raw)
+        self._to_keep -= n
+        if self._to_keep > 0:
+            return False
+
+        done = False
+        self._channel = (c + 1) % len(self.channels)
+        if self._channel == 0:
+            self._row += 1
+            if self._row == self.block_size:
+                self._row = 0
+                done = True
+        if len(self.channels) > 1:
+            self.adc.set_mux(self.channels[self._channel])
+            self._switched_at = time.monotonic()  # After the write: an edge in between counts as old
+            self._to_discard = self.discard
+        self._to_keep = self.keep
+        return done
+
+    def stats(self) -> dict:
+        return {"conversions": self.conversions, "discarded": self.discarded, "missed": self.missed}
+
+
+# ===== Simulation =====
+
+class SimulatedADS1115:
+    """Register-level ADS1115 model that stands in for the qwiic I2C driver.
+
+    Conversions complete every 1/data_rate seconds from the moment
+    continuous mode starts, and each uses the input selected when it began.
+    A multiplexer switch mid-conversion therefore yields one conversion of
+    the old input, as on the chip. ready_pin() models ALERT/RDY and only
+    pulses when the threshold registers select conversion-ready mode.
+    """
+
+    def __init__(self, address: int = 0x48, signals: Optional[Dict[str, Callable[[float], float]]] = None,
+                 noise: float = 0.0005, seed: int = 0):
+        """Initialize the model.
+
+        Args:
+            address: I2C address the model answers on
+            signals: Input name -> f(t) in volts; default a 5 Hz sine on AIN0 and
+                constant levels on the other inputs
+            noise: Gaussian noise (volts RMS) added to every conversion
+            seed: Noise seed
+        """
+        self.address = address
+        self.signals = signals or {"AIN0": lambda t: 1.0 + 0.5 * math.sin(2 * math.pi * 5 * t),
+                                   "AIN1": lambda t: 0.5, "AIN2": lambda t: 1.5, "AIN3": lambda t: 2.5}
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.regs = {CONVERSION: 0, CONFIG: DEFAULT_CFG, LO_THRESH: 0x8000, HI_THRESH: 0x7FFF}
+        self.pointer = CONVERSION
+        self.t_start: Optional[float] = None  # Continuous mode start
+        self.mux_history: List[Tuple[float, int]] = [(0.0, DEFAULT_CFG & MUX["AIN3"])]
+        self.single_done = 0.0
+        self.reads = 0
+
+    # qwiic_i2c driver interface
+
+    def isDeviceConnected(self, address) -> bool:
+        return address == self.address
+
+    def readBlock(self, address, commandCode, nBytes):
+        self._check(address)
+        if commandCode is not None:
+            self.pointer = commandCode
+        self.reads += 1
+        value = self._register(self.pointer, time.monotonic())
+        return [(value >> 8) & 0xFF, value & 0xFF][:nBytes]
+
+    def writeBlock(self, address, commandCode, value):
+        self._check(address)
+        self.pointer = commandCode
+        word = (value[0] << 8) | value[1]
+        now = time.monotonic()
+        if commandCode == CONFIG:
+            old = self.regs[CONFIG]
+            if word & MUX["AIN3"] != old & MUX["AIN3"]:
+                self.mux_history = self.mux_history[-8:] + [(now, word & MUX["AIN3"])]
+            if word & MODE_SINGLE:
+                self.t_start = None
+                if word & OS:
+                    self.single_done = now + self.period(word)
+                    self._convert(now + self.period(word), word & MUX["AIN3"])
+            elif self.t_start is None:
+                self.t_start = now
+            word &= ~OS
+        self.regs[commandCode] = word
+
+    # Model
+
+    def period(self, cfg: Optional[int] = None) -> float:
+        code = (self.regs[CONFIG] if cfg is None else cfg) & DATA_RATES[860]
+        return 1.0 / {v: k for k, v in DATA_RATES.items()}[code]
+
+    def fsr(self) -> float:
+        code = self.regs[CONFIG] & (0b111 << 9)
+        return {v: k for k, v in FSR.items()}.get(code, 0.256)
+
+    def completed(self, t: float) -> int:
+        """Conversions completed by time t in continuous mode."""
+        return int((t - self.t_start) / self.period()) if self.t_start is not None else 0
+
+    def ready_mode(self) -> bool:
+        return (self.regs[HI_THRESH] & 0x8000 and not self.regs[LO_THRESH] & 0x8000
+                and self.regs[CONFIG] & 0b11 != COMP_QUE_DISABLE)
+
+    def ready_pin(self) -> "_SimulatedReadyPin":
+        return _SimulatedReadyPin(self)
+
+    def _mux_at(self, t: float) -> int:
+        mux = self.mux_history[0][1]
+        for t_change, m in self.mux_history:
+            if t_change <= t:
+                mux = m
+        return mux
+
+    def _convert(self, t_end: float, mux: int):
+        name = next(k for k, v in MUX.items() if v == mux)
+        volts = self.signals.get(name, lambda t: 0.0)(t_end) + self.noise * self.rng.standard_normal()
+        self.regs[CONVERSION] = int(np.clip(round(volts / self.fsr() * 32768), -32768, 32767)) & 0xFFFF
+
+    def _register(self, reg: int, now: float) -> int:
+        if reg == CONVERSION and self.t_start is not None:
+            k = self.completed(now)
+            if k > 0:
+                p = self.period()
+                self._convert(self.t_start + k * p, self._mux_at(self.t_start + (k - 1) * p))
+        if reg == CONFIG:
+            done = self.t_start is None and now >= self.single_done
+            return self.regs[CONFIG] | (OS if done else 0)
+        return self.regs[reg]
+
+    def _check(self, address):
+        if address != self.address:
+            raise OSError(121, "Remote I/O error")
+
+
+class _SimulatedReadyPin:
+    """ALERT/RDY edges of a SimulatedADS1115 in continuous mode."""
+
+    def __init__(self, sim: SimulatedADS1115):
+        self.sim = sim
+        self.t_start: Optional[float] = None
+        self.reported = 0  # Conversions already signalled since t_start
+
+    def wait(self, timeout: float) -> List[float]:
+        sim = self.sim
+        now = time.monotonic()
+        if sim.t_start is None or not sim.ready_mode():
+            time.sleep(timeout)
+            return []
+        if sim.t_start != self.t_start:
+            # Continuous mode (re)started: edges count from here
+            self.t_start = sim.t_start
+            self.reported = sim.completed(now)
+        p = sim.period()
+        k = sim.completed(now)
+        if k <= self.reported:
+            t_next = sim.t_start + (self.reported + 1) * p
+            if t_next - now > timeout:
+                time.sleep(timeout)
+                return []
+            time.sleep(t_next - now)
+            k = self.reported + 1
+        stamps = [sim.t_start + i * p for i in range(self.reported + 1, k + 1)]
+        self.reported = k
+        return stamps
+
+    def close(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream ADS1115 conversions")
+    parser.add_argument("--address", default="0x48", help="I2C address (default: 0x48)")
+    parser.add_argument("--bus", type=int, default=1, help="I2C bus (default: 1)")
+    parser.add_argument("--channels", nargs="+", default=["AIN0"], help="Inputs to scan (default: AIN0)")
+    parser.add_argument("--rate", type=int, default=860, help="Data rate in SPS (default: 860)")
+    parser.add_argument("--fsr", type=float, default=4.096, help="Full-scale range in volts (default: 4.096)")
+    parser.add_argument("--chip", default="gpiochip4", help="GPIO chip of the ALERT/RDY line (default: gpiochip4)")
+    parser.add_argument("--alert-pin", type=int, help="GPIO line of ALERT/RDY (default: timed reads)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Capture length (default: 5)")
+    parser.add_argument("--csv", help="Write timestamp,volts per channel to this CSV")
+    parser.add_argument("--simulate", action="store_true", help="Use the simulated ADS1115")
+    args = parser.parse_args()
+
+    address = int(args.address, 0)
+    if args.simulate:
+        sim = SimulatedADS1115(address)
+        adc = ADS1115(address, i2c_driver=sim, fsr=args.fsr, data_rate=args.rate)
+        ready = sim.ready_pin()
+    else:
+        import qwiic_i2c
+        adc = ADS1115(address, i2c_driver=qwiic_i2c.getI2CDriver(iBus=args.bus), fsr=args.fsr, data_rate=args.rate)
+        if not adc.is_connected():
+            print(f"[ERROR] No ADS1115 at 0x{address:02X} on bus {args.bus}")
+            sys.exit(1)
+        ready = GpioReadyPin(args.chip, args.alert_pin) if args.alert_pin is not None else None
+        if ready is None:
+            print("[WARN] No --alert-pin: pacing reads by time, expect duplicated or skipped conversions")
+
+    stream = ADS1115Stream(adc, args.channels, ready)
+    out = open(args.csv, 'w') if args.csv else None
+    if out:
+        out.write(",".join(f"t_{c},{c}" for c in stream.channels) + "\n")
+    rows = 0
+    stream.start()
+    t0 = time.perf_counter()
+    try:
+        while time.perf_counter() - t0 < args.seconds:
+            block = stream.read_block()
+            if block is None:
+                print("[WARN] No conversions (is ALERT/RDY wired and pulled up?)")
+                break
+            times, volts = block
+            rows += len(times)
+            if out:
+                table = np.empty((len(times), 2 * len(stream.channels)))
+                table[:, 0::2], table[:, 1::2] = times, volts
+                np.savetxt(out, table, delimiter=",", fmt="%.6f")
+            print(f"{rows:7d} rounds | " + " ".join(f"{c}={v:+.4f} V" for c, v in zip(stream.channels, volts[-1])))
+    except KeyboardInterrupt:
+        print("\n[EXIT] Stopping ADS1115 stream.")
+    finally:
+        stream.stop()
+        stream.ready.close()
+        if out:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    print(f"[OK] {rows} rounds in {elapsed:.2f} s ({rows / elapsed:.1f}/s per channel, "
+          f"nominal {stream.channel_rate:.1f}), {stream.stats()}")
+
+
+if __name__ == '__main__':
+    main()
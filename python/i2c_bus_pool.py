@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Multi-bus I2C pool: one reader thread per bus, merged timestamped stream.
+
+qwiic_i2c.getI2CDriver() with no arguments caches a single driver on bus 1,
+so every device shares one bus and one thread. The pool opens one driver per
+bus instead (getI2CDriver(iBus=n)), gives every bus its own reader thread and
+per-device schedule, and merges all samples into one queue. smbus2 releases
+the GIL during the ioctl, so transfers on different buses overlap.
+
+Config (JSON):
+    {"devices": [
+        {"name": "imu_a", "type": "ism330dhcx", "bus": 1, "address": "0x6A", "rate_hz": 104},
+        {"name": "imu_b", "type": "ism330dhcx", "bus": 3, "address": "0x6B", "rate_hz": 104}
+    ]}
+
+Extra buses on the Pi are enabled in /boot/firmware/config.txt, e.g.
+`dtoverlay=i2c3`. Run:
+    python i2c_bus_pool.py pool.json --csv samples.csv
+"""
+
+import argparse
+import heapq
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import qwiic_i2c
+
+# Opener: (i2c_driver, address) -> read function returning a tuple of floats,
+# or None when the device has no new data yet
+DEVICE_TYPES: Dict[str, Callable] = {}
+# Names of the values each device type returns, used as CSV columns
+DEVICE_COLUMNS: Dict[str, Tuple[str, ...]] = {}
+
+
+def register_device_type(name: str, opener: Callable, columns: Sequence[str]):
+    """Make a device type available to pool configs.
+
+    Args:
+        name: Type name used in configs
+        opener: (i2c_driver, address) -> read function
+        columns: Names of the values the read function returns, in order
+    """
+    DEVICE_TYPES[name] = opener
+    DEVICE_COLUMNS[name] = tuple(columns)
+
+
+def _open_ism330dhcx(i2c_driver, address):
+    from read_ISM330DHCX2 import init_imu
+
+    imu = init_imu(address, i2c_driver=i2c_driver)
+
+    def read():
+        if not imu.check_status():
+            return None
+        a = imu.get_accel()
+        g = imu.get_gyro()
+        return (a.xData, a.yData, a.zData, g.xData, g.yData, g.zData)
+
+    return read
+
+
+register_device_type("ism330dhcx", _open_ism330dhcx,
+                     ("accel_x_mg", "accel_y_mg", "accel_z_mg", "gyro_x_mdps", "gyro_y_mdps", "gyro_z_mdps"))
+
+
+def _open_ads1115(i2c_driver, address):
+    from ads1115 import ADS1115
+
+    # Continuous AIN0 at 860 SPS; each poll returns the newest conversion in volts.
+    # For ready-paced multi-channel streaming use ads1115.ADS1115Stream directly.
+    adc = ADS1115(address, i2c_driver=i2c_driver, fsr=4.096, data_rate=860)
+    adc.start_continuous("AIN0", ready_pin=False)
+
+    def read():
+        return (adc.to_volts(adc.read_conversion()),)
+
+    return read
+
+
+register_device_type("ads1115", _open_ads1115, ("ain0_v",))
+
+
+@dataclass
+class DeviceSpec:
+    """One device on one bus, polled at rate_hz."""
+    name: str
+    type: str
+    bus: int
+    address: int
+    rate_hz: float
+
+
+@dataclass
+class Sample:
+    """One reading in the merged stream."""
+    timestamp: float
+    device: str
+    bus: int
+    values: Tuple[float, ...]
+
+
+@dataclass
+class BusStats:
+    """Per-bus counters; utilisation = busy_s / wall time."""
+    reads: int = 0
+    not_ready: int = 0
+    errors: int = 0
+    overruns: int = 0
+    busy_s: float = 0.0
+    per_device: Dict[str, int] = field(default_factory=dict)
+
+
+def load_config(path) -> List[DeviceSpec]:
+    with open(path) as f:
+        config = json.load(f)
+    specs = []
+    for dev in config["devices"]:
+        address = dev["address"]
+        specs.append(DeviceSpec(name=dev["name"], type=dev["type"], bus=int(dev["bus"]),
+                                address=int(address, 0) if isinstance(address, str) else address,
+                                rate_hz=float(dev["rate_hz"])))
+    return specs
+
+
+class BusReader:
+    """Reader thread for all devices on one bus, earliest-deadline-first."""
+
+    def __init__(self, bus: int, specs: List[DeviceSpec], output: "queue.Queue[Sample]",
+                 driver_factory: Callable = None):
+        self.bus = bus
+        self.specs = specs
+        self.output = output
+        self.driver_factory = driver_factory or (lambda bus: qwiic_i2c.getI2CDriver(iBus=bus))
+        self.stats = BusStats(per_device={s.name: 0 for s in specs})
+        self.dropped = 0
+        self.stop_flag = False
+        self.thread: Optional[threading.Thread] = None
+        self.start_time = 0.0
+        self.readers: Dict[str, Callable] = {}
+
+    def open(self):
+        """Open the bus driver and initialize every device on it."""
+        driver = self.driver_factory(self.bus)
+        if driver is None:
+            raise RuntimeError(f"No I2C driver for bus {self.bus}")
+        for spec in self.specs:
+            self.readers[spec.name] = DEVICE_TYPES[spec.type](driver, spec.address)
+
+    def start(self):
+        self.stop_flag = False
+        self.thread = threading.Thread(target=self._read_loop, name=f"i2c-bus{self.bus}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_flag = True
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+
+    def utilisation(self) -> float:
+        wall = time.perf_counter() - self.start_time
+        return self.stats.busy_s / wall if wall > 0 else 0.0
+
+    def _read_loop(self):
+        self.start_time = now = time.perf_counter()
+        # (due time, index, spec) heap; index breaks ties between equal deadlines
+        schedule = [(now, i, spec) for i, spec in enumerate(self.specs)]
+        heapq.heapify(schedule)
+        while not self.stop_flag:
+            due, i, spec = schedule[0]
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(min(delay, 0.05))
+                continue
+
+            t0 = time.perf_counter()
+            failed = False
+            try:
+                values = self.readers[spec.name]()
+            except OSError:
+                values = None
+                failed = True
+            t1 = time.perf_counter()
+            self.stats.busy_s += t1 - t0
+
+            if failed:
+                self.stats.errors += 1
+            elif values is None:
+                self.stats.not_ready += 1
+            else:
+                self.stats.reads += 1
+                self.stats.per_device[spec.name] += 1
+                try:
+                    self.output.put_nowait(Sample(time.time(), spec.name, self.bus, values))
+                except queue.Full:
+                    self.dropped += 1
+
+            period = 1.0 / spec.rate_hz
+            next_due = due + period
+            if next_due < t1 - period:
+                # More than a period behind: skip ahead rather than burst
+                self.stats.overruns += 1
+                next_due = t1 + period
+            heapq.heapreplace(schedule, (next_due, i, spec))
+
+
+class I2CBusPool:
+    """Assign devices to buses and run one BusReader per bus."""
+
+    def __init__(self, specs: List[DeviceSpec], queue_size: int = 10000, driver_factory: Callable = None):
+        self.samples: "queue.Queue[Sample]" = queue.Queue(maxsize=queue_size)
+        by_bus: Dict[int, List[DeviceSpec]] = {}
+        for spec in specs:
+            if spec.type not in DEVICE_TYPES:
+                raise ValueError(f"Unknown device type '{spec.type}' for {spec.name}")
+            by_bus.setdefault(spec.bus, []).append(spec)
+        self.buses = {bus: BusReader(bus, bus_specs, self.samples, driver_factory)
+                      for bus, bus_specs in sorted(by_bus.items())}
+
+    def start(self):
+        for reader in self.buses.values():
+            reader.open()
+        for reader in self.buses.values():
+            reader.start()
+        print(f"[OK] I2C pool running on buses {list(self.buses)}")
+
+    def stop(self):
+        for reader in self.buses.values():
+            reader.stop()
+
+    def drain(self, timeout: float = 0.1) -> List[Sample]:
+        """Return all queued samples, waiting up to timeout for the first one."""
+        out = []
+        try:
+            out.append(self.samples.get(timeout=timeout))
+            while True:
+                out.append(self.samples.get_nowait())
+        except queue.Empty:
+            pass
+        return out
+
+    def report(self) -> Dict[int, dict]:
+        """Per-bus utilisation and counters."""
+        return {bus: {"utilisation": r.utilisation(), "reads": r.stats.reads,
+                      "not_ready": r.stats.not_ready, "errors": r.stats.errors,
+                      "overruns": r.stats.overruns, "dropped": r.dropped,
+                      "per_device": dict(r.stats.per_device)}
+                for bus, r in self.buses.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read I2C devices on several buses in parallel")
+    parser.add_argument("config", help="JSON device config")
+    parser.add_argument("--csv", help="Write merged samples to this CSV")
+    parser.add_argument("--report-every", type=float, default=1.0, help="Seconds between status lines")
+    args = parser.parse_args()
+
+    specs = load_config(args.config)
+    pool = I2CBusPool(specs)
+    pool.start()
+    # One column per value name across all device types; a row fills its own type's columns
+    columns: List[str] = []
+    for spec in specs:
+        columns += [c for c in DEVICE_COLUMNS[spec.type] if c not in columns]
+    slots = {spec.name: [columns.index(c) for c in DEVICE_COLUMNS[spec.type]] for spec in specs}
+    out = open(args.csv, 'w') if args.csv else None
+    if out:
+        out.write("timestamp,device,bus," + ",".join(columns) + "\n")
+    row = [""] * len(columns)
+    last_report = time.time()
+    try:
+        while True:
+            for s in pool.drain():
+                if out:
+                    row[:] = [""] * len(columns)
+                    for slot, v in zip(slots[s.device], s.values):
+                        row[slot] = f"{v}"
+                    out.write(f"{s.timestamp},{s.device},{s.bus}," + ",".join(row) + "\n")
+            if time.time() - last_report >= args.report_every:
+                last_report = time.time()
+                line = " | ".join(f"bus{bus} {r['utilisation'] * 100:5.1f}% {r['per_device']}"
+                                  for bus, r in pool.report().items())
+                print(line)
+    except KeyboardInterrupt:
+        print("\n[EXIT] Stopping I2C pool.")
+    finally:
+        pool.stop()
+        if out:
+            out.close()
+        print(json.dumps(pool.report(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""ISM330DHCX noise characterization: Allan deviation per sensor configuration.
+
+Records long static captures for each configuration in a sweep, then
+computes the overlapping Allan deviation of every axis and reports noise
+density (white-noise level read at tau = 1 s) and bias instability
+(minimum ADEV / 0.664).
+
+The analysis streams over the capture in blocks. It keeps a running
+cumulative sum and only the last 2 * m cumulative-sum values needed for
+the largest cluster size m. Large cluster sizes use a strided history: for
+m above `dense_max_m` the sum runs over every `stride`-th start index
+only, so memory stays small even for captures of hours at kHz rates.
+
+Sweep config (JSON); settings map ISM330DHCX setters to constant names
+(or plain values), applied after the reset in order:
+    {"device": "imu_a", "address": "0x6A", "bus": 1, "seconds": 3600,
+     "configs": [
+        {"name": "odr104_lp2",
+         "settings": {"set_accel_data_rate": "kXlOdr104Hz", "set_accel_full_scale": "kXlFs4g",
+                      "set_accel_filter_lp2": true, "set_accel_slope_filter": "kLpOdrDiv100",
+                      "set_gyro_data_rate": "kGyroOdr104Hz", "set_gyro_full_scale": "kGyroFs500dps",
+                      "set_gyro_filter_lp1": true, "set_gyro_lp1_bandwidth": "kBwMedium"}}]}
+
+    python imu_allan.py capture imu_sweep.json --out captures/
+    python imu_allan.py analyze captures/imu_a --max-gyro-noise 0.01
+
+Captures are float64 rows (t, ax, ay, az, gx, gy, gz) in <config>.bin with
+a <config>.json sidecar; accel is in mg and gyro in dps. Results are cached
+in allan_cache.json in the device directory and only recomputed when a
+capture changes.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+COLUMNS = ["t", "ax", "ay", "az", "gx", "gy", "gz"]
+UNITS = {"a": "mg", "g": "dps"}
+CACHE_FILE = "allan_cache.json"
+
+# Nominal output data rates of the ODR constants
+ODR_HZ = {"Off": 0.0, "1Hz6": 1.6, "12Hz5": 12.5, "26Hz": 26.0, "52Hz": 52.0, "104Hz": 104.0,
+          "208Hz": 208.0, "416Hz": 416.0, "833Hz": 833.0, "1666Hz": 1666.0, "3332Hz": 3332.0,
+          "6667Hz": 6667.0}
+
+
+def nominal_rate(settings: dict) -> float:
+    """Highest accel/gyro ODR named in the settings (Hz), 0 if none."""
+    rate = 0.0
+    for setter in ("set_accel_data_rate", "set_gyro_data_rate"):
+        name = settings.get(setter)
+        if isinstance(name, str):
+            rate = max(rate, ODR_HZ[name.replace("kXlOdr", "").replace("kGyroOdr", "")])
+    return rate
+
+
+# ===== Streaming Allan deviation =====
+
+def cluster_sizes(max_m: int, points_per_decade: int = 10, stride: int = 1, dense_max_m: int = 0) -> np.ndarray:
+    """Log-spaced cluster sizes 1..max_m; sizes above dense_max_m are multiples of stride."""
+    m = np.unique(np.round(np.logspace(0, np.log10(max_m), int(np.log10(max_m) * points_per_decade) + 1)))
+    m = m.astype(np.int64)
+    coarse = m > dense_max_m
+    m[coarse] = np.maximum(stride, (m[coarse] // stride) * stride)
+    return np.unique(m)
+
+
+class _Tier:
+    """Allan sums for cluster sizes whose cumulative sums sit on one stride grid."""
+
+    def __init__(self, ms: np.ndarray, stride: int, channels: int):
+        self.ms = ms
+        self.stride = stride
+        self.steps = ms // stride  # Cluster sizes in grid points
+        self.hist_len = int(2 * self.steps.max())
+        self.hist = np.zeros((self.hist_len, channels))  # Grid point 0 (theta = 0) is the last row
+        self.seen = 1
+        self.sq = np.zeros((len(ms), channels))
+        self.count = np.zeros(len(ms), dtype=np.int64)
+
+    def add(self, theta: np.ndarray):
+        """Consume cumulative sums at the next grid points."""
+        n = theta.shape[0]
+        if n == 0:
+            return
+        h = self.hist_len
+        z = np.concatenate([self.hist, theta])
+        for j, k in enumerate(self.steps):
+            # Terms need theta at grid index >= 0: skip the first ones early in the stream
+            skip = max(0, 2 * k - self.seen)
+            if skip >= n:
+                continue
+            d = z[h + skip:] - 2.0 * z[h + skip - k:h + n - k] + z[h + skip - 2 * k:h + n - 2 * k]
+            self.sq[j] += np.einsum('ij,ij->j', d, d)
+            self.count[j] += n - skip
+        self.hist = z[-h:]
+        self.seen += n
+
+
+class StreamingAllan:
+    """Overlapping Allan deviation over a stream of (n, channels) blocks.
+
+    Memory is O(dense_max_m + max_m / stride) rows regardless of stream length.
+    """
+
+    def __init__(self, rate_hz: float, channels: int, max_m: int, points_per_decade: int = 10,
+                 dense_max_m: int = 4096, stride: Optional[int] = None):
+        """Initialize the estimator.
+
+        Args:
+            rate_hz: Sample rate of the stream
+            channels: Columns per block
+            max_m: Largest cluster size in samples (tau_max = max_m / rate_hz)
+            points_per_decade: Cluster sizes per decade of tau
+            dense_max_m: Largest cluster size computed with every start index
+            stride: Start-index stride above dense_max_m (default dense_max_m / 16)
+        """
+        self.rate_hz = rate_hz
+        self.channels = channels
+        dense_max_m = min(dense_max_m, max_m)
+        stride = stride or max(1, dense_max_m // 16)
+        self.ms = cluster_sizes(max_m, points_per_decade, stride, dense_max_m)
+        self.tiers = [_Tier(self.ms[self.ms <= dense_max_m], 1, channels)]
+        if (self.ms > dense_max_m).any():
+            self.tiers.append(_Tier(self.ms[self.ms > dense_max_m], stride, channels))
+        self.samples = 0
+        self.level = np.zeros(channels)
+        self.offset: Optional[np.ndarray] = None
+
+    def update(self, block: np.ndarray):
+        """Add consecutive samples, shape (n, channels)."""
+        if len(block) == 0:
+            return
+        if self.offset is None:
+            # Removing a constant keeps the cumulative sum small; second differences cancel it
+            self.offset = block.mean(axis=0)
+        theta = np.cumsum(block - self.offset, axis=0)
+        theta += self.level
+        for tier in self.tiers:
+            if tier.stride == 1:
+                tier.add(theta)
+            else:
+                # Sample i of this block is cumulative-sum index samples + i + 1
+                first = (-(self.samples + 1)) % tier.stride
+                tier.add(theta[first::tier.stride])
+        self.level = theta[-1]
+        self.samples += len(block)
+
+    def result(self):
+        """(tau, adev, terms): tau (k,), adev (k, channels), terms (k,) for cluster sizes with data."""
+        ms = np.concatenate([t.ms for t in self.tiers])
+        sq = np.concatenate([t.sq for t in self.tiers])
+        count = np.concatenate([t.count for t in self.tiers])
+        ok = count > 0
+        ms, sq, count = ms[ok], sq[ok], count[ok]
+        avar = sq / (2.0 * (ms[:, None].astype(float) ** 2) * count[:, None])
+        return ms / self.rate_hz, np.sqrt(avar), count
+
+
+def noise_metrics(tau: np.ndarray, adev: np.ndarray) -> dict:
+    """Noise density and bias instability of one ADEV curve.
+
+    Noise density is the tau^-1/2 line fitted where the local slope is close
+    to -1/2, evaluated at tau = 1 s (units per sqrt(Hz)). Bias instability is
+    the flat-region minimum divided by sqrt(2 ln 2 / pi) = 0.664.
+    """
+    log_tau, log_adev = np.log(tau), np.log(adev)
+    slope = np.diff(log_adev) / np.diff(log_tau)
+    white = np.abs(slope + 0.5) < 0.15
+    if white.any():
+        # First run of white-noise slopes, points on both ends of each segment
+        start = int(np.argmax(white))
+        end = start
+        while end < len(white) and white[end]:
+            end += 1
+        idx = np.arange(start, end + 1)
+    else:
+        idx = np.array([0])
+    density = float(np.exp(np.mean(log_adev[idx] + 0.5 * log_tau[idx])))
+    i_min = int(np.argmin(adev))
+    return {"noise_density": density, "bias_instability": float(adev[i_min] / 0.664),
+            "tau_min_s": float(tau[i_min]), "adev_min": float(adev[i_min])}
+
+
+# ===== Capture =====
+
+def _setting_value(imu, value):
+    return getattr(imu, value) if isinstance(value, str) else value
+
+
+def configure_imu(address: int, settings: dict, i2c_driver=None):
+    """Reset the IMU and apply `settings` in order."""
+    import qwiic_ism330dhcx
+
+    imu = qwiic_ism330dhcx.QwiicISM330DHCX(address=address, i2c_driver=i2c_driver)
+    imu.begin()
+    imu.device_reset()
+    while not imu.get_device_reset():
+        time.sleep(0.1)
+    imu.set_device_config()
+    imu.set_block_data_update()
+    for setter, value in settings.items():
+        if value is True:
+            getattr(imu, setter)()
+        else:
+            getattr(imu, setter)(_setting_value(imu, value))
+    return imu
+
+
+def _hardware_rows(imu, seconds: float, chunk: int):
+    """Yield (chunk, 7) blocks of timestamped samples polled from the IMU."""
+    buf = np.zeros((chunk, len(COLUMNS)))
+    n = 0
+    end = time.perf_counter() + seconds
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        if not imu.check_status():
+            continue
+        a = imu.get_accel()
+        g = imu.get_gyro()
+        # get_gyro() reports mdps; captures store dps like the UNITS table
+        buf[n] = (time.perf_counter(), a.xData, a.yData, a.zData,
+                  g.xData / 1000.0, g.yData / 1000.0, g.zData / 1000.0)
+        n += 1
+        if n == chunk:
+            yield buf
+            n = 0
+    if n:
+        yield buf[:n]
+
+
+def _simulated_rows(rate_hz: float, seconds: float, chunk: int, seed: int = 0):
+    """Synthetic static IMU: white noise, bias random walk and gravity on z."""
+    rng = np.random.default_rng(seed)
+    total = int(rate_hz * seconds)
+    # Datasheet-like densities: 60 ug/sqrt(Hz) accel, 5 mdps/sqrt(Hz) gyro
+    white = np.array([0.06] * 3 + [0.005] * 3) * np.sqrt(rate_hz)
+    walk = np.array([0.002] * 3 + [0.0002] * 3) / np.sqrt(rate_hz)
+    bias = np.zeros(6)
+    gravity = np.array([0.0, 0.0, 1000.0, 0.0, 0.0, 0.0])
+    t0 = time.perf_counter()
+    for start in range(0, total, chunk):
+        n = min(chunk, total - start)
+        steps = np.cumsum(rng.standard_normal((n, 6)) * walk, axis=0) + bias
+        bias = steps[-1]
+        block = np.empty((n, len(COLUMNS)))
+        block[:, 0] = t0 + (start + np.arange(n)) / rate_hz
+        block[:, 1:] = gravity + steps + rng.standard_normal((n, 6)) * white
+        yield block
+
+
+def record_capture(path: Path, rows, meta: dict) -> dict:
+    """Stream row blocks to path.bin and write the path.json sidecar."""
+    samples = 0
+    t_first = t_last = None
+    with open(path.with_suffix(".bin"), "wb") as f:
+        for block in rows:
+            f.write(np.ascontiguousarray(block, dtype=np.float64).tobytes())
+            if t_first is None:
+                t_first = float(block[0, 0])
+            t_last = float(block[-1, 0])
+            samples += len(block)
+    duration = (t_last - t_first) if samples > 1 else 0.0
+    meta = dict(meta, samples=samples, duration_s=duration, columns=COLUMNS,
+                rate_hz=(samples - 1) / duration if duration > 0 else meta["nominal_rate_hz"])
+    expected = meta["nominal_rate_hz"] * duration
+    if expected:
+        meta["missed"] = max(0, int(round(expected - samples + 1)))
+    with open(path.with_suffix(".json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def run_sweep(sweep: dict, out_dir, seconds: Optional[float] = None, only: Optional[List[str]] = None,
+              simulate: bool = False, chunk: int = 4096):
+    """Record one capture per configuration into out_dir/<device>/."""
+    device_dir = Path(out_dir) / sweep["device"]
+    device_dir.mkdir(parents=True, exist_ok=True)
+    address = sweep.get("address", "0x6A")
+    address = int(address, 0) if isinstance(address, str) else address
+    seconds = seconds or sweep.get("seconds", 600)
+    driver = None
+    if not simulate:
+        import qwiic_i2c
+        driver = qwiic_i2c.getI2CDriver(iBus=sweep.get("bus", 1))
+
+    for i, config in enumerate(sweep["configs"]):
+        if only and config["name"] not in only:
+            continue
+        settings = config["settings"]
+        meta = {"device": sweep["device"], "address": address, "config": config["name"],
+                "settings": settings, "nominal_rate_hz": nominal_rate(settings),
+                "simulated": simulate, "started": time.time()}
+        print(f"[OK] Capturing {config['name']} for {seconds:.0f} s ({meta['nominal_rate_hz']:g} Hz) ...")
+        if simulate:
+            rows = _simulated_rows(meta["nominal_rate_hz"], seconds, chunk, seed=i)
+        else:
+            imu = configure_imu(address, settings, i2c_driver=driver)
+            time.sleep(0.5)  # Let the filters settle after the reconfiguration
+            rows = _hardware_rows(imu, seconds, chunk)
+        meta = record_capture(device_dir / config["name"], rows, meta)
+        line = f"[OK] {meta['samples']} samples at {meta['rate_hz']:.1f} Hz"
+        if meta.get("missed"):
+            line += f" ({meta['missed']} missed: polling too slow, ADEV assumes uniform sampling)"
+        print(line)
+
+
+# ===== Analysis =====
+
+def analyze_capture(path, points_per_decade: int = 10, block: int = 1 << 16, min_clusters: int = 9) -> dict:
+    """Allan deviation and noise metrics for every axis of one capture."""
+    path = Path(path)
+    with open(path.with_suffix(".json")) as f:
+        meta = json.load(f)
+    data = np.memmap(path.with_suffix(".bin"), dtype=np.float64, mode="r").reshape(-1, len(COLUMNS))
+    n = data.shape[0]
+    if n < 2 * min_clusters:
+        raise ValueError(f"{path.name}: only {n} samples")
+    allan = StreamingAllan(meta["rate_hz"], len(COLUMNS) - 1, max(1, n // min_clusters), points_per_decade)
+    t0 = time.perf_counter()
+    for start in range(0, n, block):
+        allan.update(np.asarray(data[start:start + block, 1:]))
+    tau, adev, terms = allan.result()
+    axes = {}
+    for c, name in enumerate(COLUMNS[1:]):
+        axes[name] = dict(noise_metrics(tau, adev[:, c]), units=UNITS[name[0]])
+    return {"config": meta["config"], "settings": meta["settings"], "rate_hz": meta["rate_hz"],
+            "nominal_rate_hz": meta["nominal_rate_hz"], "samples": n,
+            "analysis_s": time.perf_counter() - t0, "tau": tau.tolist(),
+            "adev": {name: adev[:, c].tolist() for c, name in enumerate(COLUMNS[1:])},
+            "axes": axes}
+
+
+def _capture_key(path: Path) -> dict:
+    st = path.with_suffix(".bin").stat()
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+def analyze_device(device_dir, workers: Optional[int] = None, points_per_decade: int = 10,
+                   force: bool = False) -> Dict[str, dict]:
+    """Analyze every capture in device_dir in parallel, reusing cached results."""
+    device_dir = Path(device_dir)
+    cache_path = device_dir / CACHE_FILE
+    cache = {}
+    if cache_path.exists() and not force:
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    captures = sorted(p.with_suffix("") for p in device_dir.glob("*.bin"))
+    results, todo = {}, []
+    for path in captures:
+        entry = cache.get(path.name)
+        if entry and entry["key"] == _capture_key(path) and entry["points_per_decade"] == points_per_decade:
+            results[path.name] = entry["result"]
+        else:
+            todo.append(path)
+
+    if todo:
+        print(f"[OK] Analyzing {len(todo)} capture(s), {len(results)} cached")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {path: pool.submit(analyze_capture, path, points_per_decade) for path in todo}
+            for path, future in futures.items():
+                results[path.name] = future.result()
+                cache[path.name] = {"key": _capture_key(path), "points_per_decade": points_per_decade,
+                                    "result": results[path.name]}
+        tmp = cache_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp, cache_path)
+    return results
+
+
+def worst(result: dict, sensor: str, metric: str) -> float:
+    """Largest metric over the three axes of 'a' (accel) or 'g' (gyro)."""
+    return max(result["axes"][sensor + axis][metric] for axis in "xyz")
+
+
+def cheapest(results: Dict[str, dict], limits: Dict[str, Optional[float]]) -> Optional[str]:
+    """Lowest-rate configuration meeting every limit (None when none does)."""
+    passing = []
+    for name, r in results.items():
+        ok = all(limit is None or worst(r, key[0], key[2:]) <= limit for key, limit in limits.items())
+        if ok:
+            passing.append((r["nominal_rate_hz"] or r["rate_hz"], name))
+    return min(passing)[1] if passing else None
+
+
+def print_table(results: Dict[str, dict]):
+    print(f"{'config':<24}{'rate Hz':>9}{'accel N':>12}{'accel B':>11}{'gyro N':>12}{'gyro B':>11}")
+    print(f"{'':<24}{'':>9}{'mg/rtHz':>12}{'mg':>11}{'dps/rtHz':>12}{'dps':>11}")
+    for name, r in sorted(results.items(), key=lambda item: item[1]["rate_hz"]):
+        print(f"{name:<24}{r['rate_hz']:>9.1f}"
+              f"{worst(r, 'a', 'noise_density'):>12.4g}{worst(r, 'a', 'bias_instability'):>11.4g}"
+              f"{worst(r, 'g', 'noise_density'):>12.4g}{worst(r, 'g', 'bias_instability'):>11.4g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ISM330DHCX Allan deviation characterization")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cap = sub.add_parser("capture", help="Record static captures for every config in a sweep")
+    cap.add_argument("sweep", help="JSON sweep config")
+    cap.add_argument("--out", default="captures", help="Output root (default: captures)")
+    cap.add_argument("--seconds", type=float, help="Override capture length per config")
+    cap.add_argument("--only", nargs="+", help="Only these config names")
+    cap.add_argument("--simulate", action="store_true", help="Synthetic data instead of the IMU")
+
+    ana = sub.add_parser("analyze", help="Allan deviation of every capture in a device directory")
+    ana.add_argument("device_dir", help="e.g. captures/imu_a")
+    ana.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    ana.add_argument("--points-per-decade", type=int, default=10)
+    ana.add_argument("--force", action="store_true", help="Ignore the cache")
+    ana.add_argument("--max-accel-noise", type=float, help="Limit on accel noise density (mg/sqrt(Hz))")
+    ana.add_argument("--max-accel-bias", type=float, help="Limit on accel bias instability (mg)")
+    ana.add_argument("--max-gyro-noise", type=float, help="Limit on gyro noise density (dps/sqrt(Hz))")
+    ana.add_argument("--max-gyro-bias", type=float, help="Limit on gyro bias instability (dps)")
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        with open(args.sweep) as f:
+            sweep = json.load(f)
+        try:
+            run_sweep(sweep, args.out, args.seconds, args.only, args.simulate)
+        except KeyboardInterrupt:
+            print("\n[EXIT] Capture interrupted.")
+            sys.exit(0)
+        return
+
+    results = analyze_device(args.device_dir, args.workers, args.points_per_decade, args.force)
+    if not results:
+        print(f"[ERROR] No captures in {args.device_dir}")
+        sys.exit(1)
+    print_table(results)
+    limits = {"a_noise_density": args.max_accel_noise, "a_bias_instability": args.max_accel_bias,
+              "g_noise_density": args.max_gyro_noise, "g_bias_instability": args.max_gyro_bias}
+    if any(v is not None for v in limits.values()):
+        best = cheapest(results, limits)
+        if best:
+            print(f"[OK] Cheapest config meeting the limits: {best}")
+        else:
+            print("[WARN] No config meets the limits")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""IMU-mocap fusion: leg position and velocity at IMU rate between mocap frames.
+
+A Kalman filter with state [position, velocity, accel bias] per axis. IMU
+acceleration, rotated into the mocap frame and with gravity removed, drives
+the prediction at full rate. Every mocap position fix corrects it. All
+three axes share one noise model and see the same fixes, so they share a
+single 3x3 covariance, and x/y/z differ only in their means.
+
+Prediction runs a block at a time. Velocity and position come from
+cumulative sums over the block. The covariance uses the closed-form
+transition F(T) and process noise Q(T) of the constant-bias model, so it
+costs the same for any block length. Mocap fixes arrive late: UDP,
+Motive and the network add tens of milliseconds. Each fix is therefore
+applied at its capture time, with the state interpolated from the IMU
+history at that time. The IMU samples since then are then replayed from
+the corrected state. Samples are kept for `history_s` seconds.
+
+    fusion = ImuMocapFusion(rate_hz=1666, max_block=32, mount=MOUNT, gravity=(0, GRAVITY, 0))
+    fusion.add_fix(t_receive - latency, (x, y, z))    # whenever a frame arrives
+    p, v = fusion.process(t_block, accel_block)        # (n, 3) each, at IMU rate
+
+Usage:
+    python imu_mocap_fusion.py --simulate                      # synthetic hopper, prints errors and cost
+    python imu_mocap_fusion.py --address 0x6A --up y --latency 0.02 --csv fused.csv
+"""
+
+import argparse
+import collections
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+import quat_batch
+from quat_batch import GRAVITY
+
+LINEAR_ACTUATOR_DIR = Path(__file__).resolve().parents[1] / "linear_actuator"  # MocapReceiver (live mode)
+OUTPUT_HEADER = "timestamp,p_x,p_y,p_z,v_x,v_y,v_z"
+
+
+def transition(T: float) -> np.ndarray:
+    """State transition F(T) of [p, v, b] with p' = v, v' = a - b, b' = 0."""
+    return np.array([[1.0, T, -0.5 * T * T],
+                     [0.0, 1.0, -T],
+                     [0.0, 0.0, 1.0]])
+
+
+def process_noise(T: float, accel_psd: float, bias_psd: float) -> np.ndarray:
+    """Closed-form Q(T) for white acceleration noise and a random-walk bias.
+
+    Args:
+        T: Elapsed time (s)
+        accel_psd: Acceleration noise density squared ((m/s^2)^2/Hz)
+        bias_psd: Bias random walk density squared ((m/s^3)^2/Hz)
+    """
+    T2, T3 = T * T, T * T * T
+    return (accel_psd * np.array([[T3 / 3, T2 / 2, 0.0],
+                                  [T2 / 2, T, 0.0],
+                                  [0.0, 0.0, 0.0]])
+            + bias_psd * np.array([[T3 * T2 / 20, T2 * T2 / 8, -T3 / 6],
+                                   [T2 * T2 / 8, T3 / 3, -T2 / 2],
+                                   [-T3 / 6, -T2 / 2, T]]))
+
+
+class ImuMocapFusion:
+    """Kalman filter fusing IMU acceleration and delayed mocap positions."""
+
+    def __init__(self, rate_hz: float, max_block: int = 64, history_s: float = 0.5,
+                 accel_noise: float = 0.05, bias_walk: float = 0.01, mocap_noise: float = 5e-4,
+                 initial_velocity_std: float = 0.5, initial_bias_std: float = 0.5,
+                 mount: Optional[Sequence[float]] = None, gravity: Sequence[float] = (0.0, 0.0, GRAVITY),
+                 accel_scale: float = 1.0):
+        """Initialize the filter.
+
+        Args:
+            rate_hz: Nominal IMU rate, sizes the history
+            max_block: Largest block passed to process()
+            history_s: How late a mocap fix may arrive and still be applied
+            accel_noise: Acceleration noise density (m/s^2/sqrt(Hz)), including vibration
+            bias_walk: Accelerometer bias random walk (m/s^3/sqrt(Hz))
+            mocap_noise: Mocap position noise (m, 1 sigma)
+            initial_velocity_std: Velocity uncertainty at the first fix (m/s)
+            initial_bias_std: Bias uncertainty at the first fix (m/s^2)
+            mount: Quaternion [i, j, k, r] rotating IMU axes into the mocap frame
+            gravity: Gravity in the mocap frame (m/s^2), pointing up as the accelerometer sees it
+            accel_scale: Factor from raw accelerometer units to m/s^2 (GRAVITY / 1000 for mg)
+        """
+        self.max_block = max_block
+        self.accel_psd = accel_noise ** 2
+        self.bias_psd = bias_walk ** 2
+        self.mocap_var = mocap_noise ** 2
+        self.P0 = np.diag([self.mocap_var, initial_velocity_std ** 2, initial_bias_std ** 2])
+        self.mount = np.array(mount if mount is not None else (0.0, 0.0, 0.0, 1.0), dtype=float)
+        self.gravity = np.array(gravity, dtype=float)
+        self.accel_scale = accel_scale
+
+        # History of world-frame acceleration and estimates, oldest first. When
+        # full, the newest `keep` samples move to the front (amortized O(1)).
+        self.keep = int(np.ceil(history_s * rate_hz))
+        capacity = self.keep + max_block
+        self._t = np.zeros(capacity)
+        self._a = np.zeros((capacity, 3))
+        self._p = np.full((capacity, 3), np.nan)
+        self._v = np.full((capacity, 3), np.nan)
+        self._n = 0
+        self._dt = np.zeros(capacity)   # Scratch for _predict
+        self._dv = np.zeros((capacity, 3))
+        self._out_p = np.zeros((max_block, 3))
+        self._out_v = np.zeros((max_block, 3))
+
+        # State just after the last fix; between fixes only p and v change
+        self.initialized = False
+        self.t_fix = -np.inf
+        self.p_fix = np.zeros(3)
+        self.v_fix = np.zeros(3)
+        self.bias = np.zeros(3)
+        self.P_fix = self.P0.copy()
+        self._pending = collections.deque()  # Fixes newer than the last IMU sample
+
+        self.fix_count = 0
+        self.dropped_fixes = 0   # Older than the previous fix or the history
+        self.replayed = 0        # Samples re-integrated after late fixes
+
+    # ===== IMU =====
+
+    def process(self, t: np.ndarray, accel: np.ndarray, quats: Optional[np.ndarray] = None,
+                out_p: Optional[np.ndarray] = None,
+                out_v: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Integrate one block of IMU samples.
+
+        Args:
+            t: Sample times (n,), same clock as the fix times
+            accel: Accelerometer readings (n, 3) in IMU axes, raw units
+            quats: Optional IMU orientation (n, 4), e.g. from a BNO085; the
+                mount rotation is applied after it
+            out_p: Output positions (n, 3)
+            out_v: Output velocities (n, 3)
+
+        Returns:
+            (positions, velocities) in the mocap frame, NaN before the first
+            fix. Without out_p/out_v these are views of internal buffers,
+            valid until the next call.
+        """
+        n = len(t)
+        if n > self.max_block:
+            raise ValueError(f"Block of {n} samples exceeds max_block={self.max_block}")
+        if self._n + n > len(self._t):
+            self._compact()
+        i0, i1 = self._n, self._n + n
+        self._t[i0:i1] = t
+        a = self._a[i0:i1]
+        np.multiply(accel, self.accel_scale, out=a)
+        rotation = self.mount if quats is None else quat_batch.multiply(self.mount, quats)
+        quat_batch.rotate(rotation, a, out=a)
+        a -= self.gravity
+        self._n = i1
+
+        if self.initialized:
+            if i0 > 0 and self._t[i0 - 1] >= self.t_fix:
+                self._predict(i0, i1, self._t[i0 - 1], self._p[i0 - 1], self._v[i0 - 1])
+            else:
+                # First samples after the fix (or the history was empty)
+                self._predict_from_fix(i0)
+        else:
+            self._p[i0:i1] = np.nan
+            self._v[i0:i1] = np.nan
+        while self._pending and self._pending[0][0] <= self._t[i1 - 1]:
+            self._apply_fix(*self._pending.popleft())
+
+        if out_p is None:
+            out_p = self._out_p[:n]
+        if out_v is None:
+            out_v = self._out_v[:n]
+        out_p[:] = self._p[i0:i1]
+        out_v[:] = self._v[i0:i1]
+        return out_p, out_v
+
+    def _predict(self, i0: int, i1: int, t_start: float, p0: np.ndarray, v0: np.ndarray):
+        """Integrate history samples i0..i1 from state (p0, v0) at t_start.
+
+        Sample k's acceleration is held over (t[k-1], t[k]].
+        """
+        m = i1 - i0
+        if m <= 0:
+            return
+        t = self._t
+        dt = self._dt[:m]
+        dt[0] = t[i0] - t_start
+        np.subtract(t[i0 + 1:i1], t[i0:i1 - 1], out=dt[1:])
+        dt_col = dt[:, None]
+        dv = self._dv[:m]
+        np.subtract(self._a[i0:i1], self.bias, out=dv)
+        dv *= dt_col
+        v = self._v[i0:i1]
+        p = self._p[i0:i1]
+        np.cumsum(dv, axis=0, out=v)
+        v += v0
+        # Position step: v[k-1] dt + dv dt / 2 = (v[k] - dv / 2) dt
+        np.multiply(dv, -0.5, out=p)
+        p += v
+        p *= dt_col
+        np.cumsum(p, axis=0, out=p)
+        p += p0
+
+    def _predict_from_fix(self, i0: int):
+        """Re-integrate every history sample from index i0 on, starting at the last fix."""
+        self._predict(i0, self._n, self.t_fix, self.p_fix, self.v_fix)
+
+    def _compact(self):
+        keep = min(self.keep, self._n)
+        start = self._n - keep
+        for buf in (self._t, self._a, self._p, self._v):
+            buf[:keep] = buf[start:self._n]
+        self._n = keep
+
+    # ===== Mocap =====
+
+    def add_fix(self, t_fix: float, position: Sequence[float]) -> bool:
+        """Correct the state with a mocap position captured at t_fix.
+
+        t_fix is the capture time (receive time minus the known latency), so
+        the fix may lie before IMU samples that were already integrated; those
+        are replayed from the corrected state. A fix newer than the last IMU
+        sample waits for the process() call whose block reaches it.
+
+        Returns:
+            True if the fix was applied or queued
+        """
+        z = np.array(position, dtype=float)
+        if t_fix <= (self._pending[-1][0] if self._pending else self.t_fix):
+            self.dropped_fixes += 1
+            return False
+        if self._n and t_fix > self._t[self._n - 1]:
+            self._pending.append((t_fix, z))
+            return True
+        return self._apply_fix(t_fix, z)
+
+    def _apply_fix(self, t_fix: float, z: np.ndarray) -> bool:
+        n = self._n
+        k = int(np.searchsorted(self._t[:n], t_fix, side='right')) - 1  # Last sample at or before t_fix
+        if k < 0 and n:
+            self.dropped_fixes += 1  # Earlier than the whole history
+            return False
+
+        if not self.initialized:
+            self.initialized = True
+            self.t_fix = t_fix
+            self.p_fix[:] = z
+            self.v_fix[:] = 0.0
+            self.P_fix[:] = self.P0
+            self._predict_from_fix(k + 1)
+            self.fix_count += 1
+            return True
+
+        # Start from the sample before t_fix unless the previous fix is more recent
+        if k >= 0 and self._t[k] >= self.t_fix:
+            t_s, p_s, v_s = self._t[k], self._p[k], self._v[k]
+        else:
+            t_s, p_s, v_s = self.t_fix, self.p_fix, self.v_fix
+        a = self._a[k + 1] if k + 1 < n else self.bias  # No IMU data yet: no net acceleration
+        tau = t_fix - t_s
+        da = a - self.bias
+        p = p_s + v_s * tau + 0.5 * tau * tau * da
+        v = v_s + tau * da
+
+        T = t_fix - self.t_fix
+        F = transition(T)
+        P = F @ self.P_fix @ F.T + process_noise(T, self.accel_psd, self.bias_psd)
+        gain = P[:, 0] / (P[0, 0] + self.mocap_var)
+        innovation = z - p
+        self.p_fix[:] = p + gain[0] * innovation
+        self.v_fix[:] = v + gain[1] * innovation
+        self.bias += gain[2] * innovation
+        P -= np.outer(gain, P[0])
+        self.P_fix[:] = 0.5 * (P + P.T)
+        self.t_fix = t_fix
+        self.fix_count += 1
+
+        self._predict_from_fix(k + 1)
+        self.replayed += n - (k + 1)
+        return True
+
+    # ===== State =====
+
+    @property
+    def time(self) -> float:
+        return self._t[self._n - 1] if self._n else self.t_fix
+
+    @property
+    def position(self) -> np.ndarray:
+        return self._p[self._n - 1] if self._n and self._t[self._n - 1] >= self.t_fix else self.p_fix
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self._v[self._n - 1] if self._n and self._t[self._n - 1] >= self.t_fix else self.v_fix
+
+    def covariance(self, t: Optional[float] = None) -> np.ndarray:
+        """Shared [p, v, b] covariance of each axis at time t (default: latest sample)."""
+        t = self.time if t is None else t
+        T = max(0.0, t - self.t_fix)
+        F = transition(T)
+        return F @ self.P_fix @ F.T + process_noise(T, self.accel_psd, self.bias_psd)
+
+
+# ===== Simulation =====
+
+def simulate_hopper(seconds: float, rate_hz: float, seed: int = 0):
+    """Spring-mass hopper on z with small x/y sway: (t, position, velocity, accel) at rate_hz.
+
+    Flight is ballistic; in stance a stiff damped spring acts on the foot,
+    so every landing is a short, hard impact.
+    """
+    substeps = 10
+    h = 1.0 / (rate_hz * substeps)
+    n = int(seconds * rate_hz)
+    rest, k_m, c_m = 0.05, 4000.0, 20.0   # Leg length (m), stiffness and damping per unit mass
+    z, vz = 0.15, 0.0
+    t = np.arange(n) / rate_hz
+    pos = np.zeros((n, 3))
+    vel = np.zeros((n, 3))
+    acc = np.zeros((n, 3))
+    for i in range(n):
+        a_sum = 0.0
+        for _ in range(substeps):
+            az = -GRAVITY + (k_m * (rest - z) - c_m * vz if z < rest else 0.0)
+            vz += az * h
+            z += vz * h
+            a_sum += az
+        pos[i, 2] = z
+        vel[i, 2] = vz
+        acc[i, 2] = a_sum / substeps
+    w = 2 * np.pi * np.array([0.7, 1.1])
+    pos[:, 0] = 0.02 * np.sin(w[0] * t)
+    pos[:, 1] = 0.01 * np.sin(w[1] * t)
+    vel[:, 0] = 0.02 * w[0] * np.cos(w[0] * t)
+    vel[:, 1] = 0.01 * w[1] * np.cos(w[1] * t)
+    acc[:, 0] = -0.02 * w[0] ** 2 * np.sin(w[0] * t)
+    acc[:, 1] = -0.01 * w[1] ** 2 * np.sin(w[1] * t)
+    return t, pos, vel, acc
+
+
+def run_simulation(args):
+    rng = np.random.default_rng(args.seed)
+    t, pos, vel, acc = simulate_hopper(args.seconds, args.rate)
+    n = len(t)
+    bias = np.array([0.15, -0.1, 0.2])
+    accel = acc + np.array([0.0, 0.0, GRAVITY]) + bias + rng.standard_normal((n, 3)) * 0.03 * np.sqrt(args.rate)
+
+    step = max(1, int(round(args.rate / args.mocap_rate)))
+    frames = np.arange(0, n, step)
+    fixes = pos[frames] + rng.standard_normal((len(frames), 3)) * args.mocap_noise
+    arrivals = t[frames] + args.latency
+
+    fusion = ImuMocapFusion(args.rate, max_block=args.block, history_s=args.history,
+                            accel_noise=args.accel_noise, bias_walk=args.bias_walk,
+                            mocap_noise=args.mocap_noise)
+    p_est = np.empty((n, 3))
+    v_est = np.empty((n, 3))
+    # GUI-style estimate: last mocap frame and the difference of the last two, held until the next
+    p_held = np.full((n, 3), np.nan)
+    v_diff = np.full((n, 3), np.nan)
+    next_fix = 0
+    elapsed = 0.0
+    for start in range(0, n, args.block):
+        end = min(n, start + args.block)
+        t_now = t[end - 1]
+        while next_fix < len(frames) and arrivals[next_fix] <= t_now:
+            f = next_fix
+            t0 = time.perf_counter()
+            fusion.add_fix(arrivals[f] - args.latency, fixes[f])
+            elapsed += time.perf_counter() - t0
+            i = np.searchsorted(t, arrivals[f])
+            p_held[i:] = fixes[f]
+            if f:
+                v_diff[i:] = (fixes[f] - fixes[f - 1]) / (t[frames[f]] - t[frames[f - 1]])
+            next_fix += 1
+        t0 = time.perf_counter()
+        fusion.process(t[start:end], accel[start:end], out_p=p_est[start:end], out_v=v_est[start:end])
+        elapsed += time.perf_counter() - t0
+
+    if not fusion.fix_count:
+        print(f"[WARN] No fix applied: --history {args.history} s is shorter than the latency")
+        return
+    settled = t > 1.0  # Let the bias converge
+    def rms(err):
+        return np.sqrt(np.nanmean(err[settled] ** 2))
+    print(f"{n} IMU samples at {args.rate:.0f} Hz, {len(frames)} mocap fixes at {args.mocap_rate:.0f} Hz "
+          f"arriving {args.latency * 1000:.0f} ms late")
+    print(f"  position RMS: fused {rms(p_est - pos) * 1000:6.2f} mm   latest mocap frame {rms(p_held - pos) * 1000:6.2f} mm")
+    print(f"  velocity RMS: fused {rms(v_est - vel):6.3f} m/s  mocap difference   {rms(v_diff - vel):6.3f} m/s")
+    print(f"  bias estimate {np.round(fusion.bias, 3)} (true {bias})")
+    print(f"  cost: {elapsed / n * 1e6:.1f} us per IMU sample in blocks of {args.block}, fixes included "
+          f"({fusion.replayed / max(1, fusion.fix_count):.0f} samples replayed per fix)")
+
+
+# ===== Live =====
+
+def run_live(args):
+    sys.path.insert(0, str(LINEAR_ACTUATOR_DIR))
+    import qwiic_i2c
+    from imu_allan import configure_imu
+    from src.mocap_receiver import MocapReceiver
+
+    settings = {"set_accel_data_rate": args.odr, "set_accel_full_scale": args.fs}
+    imu = configure_imu(int(args.address, 0), settings, i2c_driver=qwiic_i2c.getI2CDriver(iBus=args.bus))
+    gravity = np.zeros(3)
+    gravity["xyz".index(args.up)] = GRAVITY
+    fusion = ImuMocapFusion(args.rate, max_block=args.block, history_s=args.history,
+                            accel_noise=args.accel_noise, bias_walk=args.bias_walk,
+                            mocap_noise=args.mocap_noise, mount=args.mount, gravity=gravity,
+                            accel_scale=GRAVITY / 1000.0)
+
+    fixes = collections.deque()  # Appended by the receive thread, drained by the IMU loop
+    receiver = MocapReceiver("0.0.0.0", args.mocap_port)
+    receiver.add_listener(lambda t, d: fixes.append((t - args.latency, (d.body_x, d.body_y, d.body_z))))
+    receiver.start()
+
+    csv = open(args.csv, 'w') if args.csv else None
+    if csv:
+        csv.write(OUTPUT_HEADER + "\n")
+    times = np.zeros(args.block)
+    accel = np.zeros((args.block, 3))
+    out = np.zeros((args.block, 7))
+    print(f"[OK] Fusing IMU 0x{int(args.address, 0):02X} with mocap on port {args.mocap_port}")
+    try:
+        while True:
+            n = 0
+            while n < args.block:
+                if imu.check_accel_status():  # The gyro stays off: check_status() would wait for it
+                    a = imu.get_accel()
+                    times[n] = time.perf_counter()
+                    accel[n] = (a.xData, a.yData, a.zData)
+                    n += 1
+            while fixes:
+                fusion.add_fix(*fixes.popleft())
+            fusion.process(times, accel, out_p=out[:, 1:4], out_v=out[:, 4:7])
+            if csv:
+                out[:, 0] = times
+                np.savetxt(csv, out, delimiter=",", fmt="%.6f")
+    except KeyboardInterrupt:
+        print("\n[EXIT] Stopping fusion.")
+    finally:
+        receiver.stop()
+        if csv:
+            csv.close()
+        print(f"[OK] {fusion.fix_count} fixes applied, {fusion.dropped_fixes} dropped, "
+              f"velocity {np.round(fusion.velocity, 3)} m/s, bias {np.round(fusion.bias, 3)} m/s^2")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuse IMU acceleration with delayed mocap positions")
+    parser.add_argument("--simulate", action="store_true", help="Run on a synthetic hopper and report errors")
+    parser.add_argument("--rate", type=float, default=1666.0, help="IMU rate in Hz (default: 1666)")
+    parser.add_argument("--block", type=int, default=16, help="IMU samples per update (default: 16)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mocap latency in seconds (default: 0.02)")
+    parser.add_argument("--history", type=float, default=0.5, help="Seconds of IMU history for late fixes (default: 0.5)")
+    parser.add_argument("--accel-noise", type=float, default=0.05, help="Accel noise density, m/s^2/sqrt(Hz) (default: 0.05)")
+    parser.add_argument("--bias-walk", type=float, default=0.01, help="Accel bias random walk, m/s^3/sqrt(Hz) (default: 0.01)")
+    parser.add_argument("--mocap-noise", type=float, default=5e-4, help="Mocap position noise in metres (default: 5e-4)")
+    parser.add_argument("--mocap-port", type=int, default=9999, help="Mocap UDP port (default: 9999)")
+    parser.add_argument("--address", default="0x6A", help="ISM330DHCX I2C address (default: 0x6A)")
+    parser.add_argument("--bus", type=int, default=1, help="I2C bus (default: 1)")
+    parser.add_argument("--odr", default="kXlOdr1666Hz", help="Accel data rate constant (default: kXlOdr1666Hz)")
+    parser.add_argument("--fs", default="kXlFs8g", help="Accel full scale constant (default: kXlFs8g)")
+    parser.add_argument("--mount", type=float, nargs=4, metavar=("I", "J", "K", "R"),
+                        help="Quaternion from IMU axes to the mocap frame (default: identity)")
+    parser.add_argument("--up", choices="xyz", default="y", help="Vertical mocap axis (default: y)")
+    parser.add_argument("--csv", help="Write fused position and velocity to this CSV")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Simulated duration (default: 10)")
+    parser.add_argument("--mocap-rate", type=float, default=100.0, help="Simulated mocap rate in Hz (default: 100)")
+    parser.add_argument("--seed", type=int, default=0, help="Simulation seed")
+    args = parser.parse_args()
+
+    if args.simulate:
+        run_simulation(args)
+    else:
+        run_live(args)
+
+
+if __name__ == '__main__':
+    main()
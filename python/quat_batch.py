@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Vectorized quaternion operations for whole IMU recordings.
+
+NumPy versions of the orientation helpers in src/util.cpp, applied to
+arrays of samples instead of one sample at a time. Quaternions use the
+same component order as the C++ code and the BNO085 rotation vector:
+(..., 4) arrays of [i, j, k, r]. Vectors are (..., 3) arrays. Leading
+dimensions broadcast, so a single quaternion (4,) can rotate a whole
+(N, 3) array.
+
+Every function takes an optional `out` array, which may be one of the
+inputs, so a long recording can be transformed in place or into buffers
+allocated once. float32 inputs stay float32 like the C++ floats.
+
+    world = rotate(quats, accel)                  # body -> world, (N, 3)
+    linear = remove_gravity(quats, accel)         # minus 1 g on world z
+    rpy = to_euler(quats)                         # roll, pitch, yaw (rad)
+    q_imu = resample(t_bno, quats, t_imu)         # slerp onto other timestamps
+
+Run `python quat_batch.py` for a timing check on synthetic data.
+"""
+
+import time
+from typing import Optional
+
+import numpy as np
+
+GRAVITY = 9.80665  # m/s^2
+
+
+def _out(out: Optional[np.ndarray], shape, *inputs) -> np.ndarray:
+    if out is None:
+        out = np.empty(shape, dtype=np.result_type(*inputs, np.float32))
+    elif out.shape != tuple(shape):
+        raise ValueError(f"out has shape {out.shape}, expected {tuple(shape)}")
+    return out
+
+
+def conjugate(q: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """(-i, -j, -k, r); the inverse of a unit quaternion."""
+    q = np.asarray(q)
+    out = _out(out, q.shape, q)
+    np.negative(q[..., :3], out=out[..., :3])
+    out[..., 3] = q[..., 3]
+    return out
+
+
+def multiply(a: np.ndarray, b: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Hamilton product a * b, component for component as quat_multiply in util.cpp."""
+    a = np.asarray(a)
+    b = np.asarray(b)
+    out = _out(out, np.broadcast_shapes(a.shape, b.shape), a, b)
+    ai, aj, ak, ar = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bi, bj, bk, br = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    # All four components first: out may alias a or b
+    i = ar * bi + ai * br + aj * bk - ak * bj
+    j = ar * bj - ai * bk + aj * br + ak * bi
+    k = ar * bk + ai * bj - aj * bi + ak * br
+    r = ar * br - ai * bi - aj * bj - ak * bk
+    out[..., 0] = i
+    out[..., 1] = j
+    out[..., 2] = k
+    out[..., 3] = r
+    return out
+
+
+def normalize(q: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Scale to unit norm (removes drift from integration or interpolation)."""
+    q = np.asarray(q)
+    out = _out(out, q.shape, q)
+    norm = np.sqrt(np.einsum('...i,...i->...', q, q))
+    np.divide(q, norm[..., None], out=out)
+    return out
+
+
+def rotate(q: np.ndarray, v: np.ndarray, out: Optional[np.ndarray] = None,
+           inverse: bool = False) -> np.ndarray:
+    """Rotate vectors by unit quaternions: q * (v, 0) * conj(q).
+
+    Uses the expanded form v + 2r(u x v) + 2u x (u x v), u = (i, j, k),
+    which is the same product without forming the intermediate quaternions.
+
+    Args:
+        q: Unit quaternions (..., 4) [i, j, k, r], e.g. body -> world
+        v: Vectors (..., 3)
+        out: Output (..., 3); may be v
+        inverse: Apply conj(q) * v * q instead (world -> body)
+    """
+    q = np.asarray(q)
+    v = np.asarray(v)
+    shape = np.broadcast_shapes(q.shape[:-1], v.shape[:-1]) + (3,)
+    out = _out(out, shape, q, v)
+    s = -1.0 if inverse else 1.0
+    ui, uj, uk, r = s * q[..., 0], s * q[..., 1], s * q[..., 2], q[..., 3]
+    vx, vy, vz = v[..., 0], v[..., 1], v[..., 2]
+    # t = 2 (u x v)
+    tx = 2 * (uj * vz - uk * vy)
+    ty = 2 * (uk * vx - ui * vz)
+    tz = 2 * (ui * vy - uj * vx)
+    x = vx + r * tx + (uj * tz - uk * ty)
+    y = vy + r * ty + (uk * tx - ui * tz)
+    z = vz + r * tz + (ui * ty - uj * tx)
+    out[..., 0] = x
+    out[..., 1] = y
+    out[..., 2] = z
+    return out
+
+
+def to_euler(q: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Roll, pitch, yaw (rad, ZYX order) as quat_to_euler in util.cpp; pitch saturates at +-pi/2."""
+    q = np.asarray(q)
+    out = _out(out, q.shape[:-1] + (3,), q)
+    qi, qj, qk, qr = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    roll = np.arctan2(2 * (qr * qi + qj * qk), 1 - 2 * (qi * qi + qj * qj))
+    pitch = np.arcsin(np.clip(2 * (qr * qj - qk * qi), -1.0, 1.0))
+    yaw = np.arctan2(2 * (qr * qk + qi * qj), 1 - 2 * (qj * qj + qk * qk))
+    out[..., 0] = roll
+    out[..., 1] = pitch
+    out[..., 2] = yaw
+    return out
+
+
+def from_euler(rpy: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Unit quaternions from roll, pitch, yaw (rad, ZYX order); inverse of to_euler."""
+    rpy = np.asarray(rpy)
+    out = _out(out, rpy.shape[:-1] + (4,), rpy)
+    half = 0.5 * rpy
+    cr, cp, cy = np.cos(half[..., 0]), np.cos(half[..., 1]), np.cos(half[..., 2])
+    sr, sp, sy = np.sin(half[..., 0]), np.sin(half[..., 1]), np.sin(half[..., 2])
+    out[..., 0] = sr * cp * cy - cr * sp * sy
+    out[..., 1] = cr * sp * cy + sr * cp * sy
+    out[..., 2] = cr * cp * sy - sr * sp * cy
+    out[..., 3] = cr * cp * cy + sr * sp * sy
+    return out
+
+
+def slerp(q0: np.ndarray, q1: np.ndarray, u: np.ndarray,
+          out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Spherical linear interpolation between unit quaternions, u in [0, 1].
+
+    Takes the short way round (q and -q are the same rotation) and falls
+    back to normalized linear interpolation for nearly equal quaternions.
+    """
+    q0 = np.asarray(q0)
+    q1 = np.asarray(q1)
+    u = np.asarray(u)[..., None]
+    out = _out(out, np.broadcast_shapes(q0.shape, q1.shape, u.shape), q0, q1)
+    dot = np.einsum('...i,...i->...', q0, q1)[..., None]
+    sign = np.where(dot < 0, -1.0, 1.0)
+    dot = np.minimum(np.abs(dot), 1.0)
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    near = sin_theta < 1e-6
+    safe = np.where(near, 1.0, sin_theta)
+    w0 = np.where(near, 1 - u, np.sin((1 - u) * theta) / safe)
+    w1 = np.where(near, u, np.sin(u * theta) / safe) * sign
+    np.add(w0 * q0, w1 * q1, out=out)
+    return normalize(out, out=out)
+
+
+def resample(t_src: np.ndarray, q_src: np.ndarray, t_dst: np.ndarray,
+             out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Orientation at new timestamps by slerp between neighbouring samples.
+
+    Times outside [t_src[0], t_src[-1]] hold the first or last orientation.
+
+    Args:
+        t_src: Increasing timestamps of q_src, shape (N,)
+        q_src: Unit quaternions (N, 4)
+        t_dst: Timestamps to interpolate at, shape (M,)
+        out: Output (M, 4)
+    """
+    t_src = np.asarray(t_src)
+    t_dst = np.asarray(t_dst)
+    q_src = np.asarray(q_src)
+    if len(t_src) < 2:
+        out = _out(out, t_dst.shape + (4,), q_src)
+        out[:] = q_src[0]
+        return out
+    idx = np.clip(np.searchsorted(t_src, t_dst, side='right') - 1, 0, len(t_src) - 2)
+    t0 = t_src[idx]
+    u = np.clip((t_dst - t0) / (t_src[idx + 1] - t0), 0.0, 1.0)
+    return slerp(q_src[idx], q_src[idx + 1], u, out=out)
+
+
+def remove_gravity(q: np.ndarray, accel: np.ndarray, out: Optional[np.ndarray] = None,
+                   g: float = GRAVITY) -> np.ndarray:
+    """World-frame linear acceleration from body-frame accelerometer readings.
+
+    The accelerometer measures specific force, so a sensor at rest reads
+    +g along world z after rotation; subtracting it leaves the motion.
+
+    Args:
+        q: Body -> world unit quaternions (..., 4), e.g. the BNO085 rotation vector
+        accel: Accelerometer readings (..., 3), gravity included
+        out: Output (..., 3); may be accel
+        g: Gravity in the units of accel (9.80665 for m/s^2, 1000 for mg)
+    """
+    out = rotate(q, accel, out=out)
+    out[..., 2] -= g
+    return out
+
+
+# ===== Timing check =====
+
+def _rotate_loop(q, v):
+    """Per-sample rotation in plain Python, as an analysis script would write it."""
+    out = []
+    for (qi, qj, qk, qr), (vx, vy, vz) in zip(q.tolist(), v.tolist()):
+        ti = qr * vx + qj * vz - qk * vy
+        tj = qr * vy - qi * vz + qk * vx
+        tk = qr * vz + qi * vy - qj * vx
+        tr = -qi * vx - qj * vy - qk * vz
+        out.append((tr * -qi + ti * qr + tj * -qk - tk * -qj,
+                    tr * -qj - ti * -qk + tj * qr + tk * -qi,
+                    tr * -qk + ti * -qj - tj * -qi + tk * qr))
+    return np.array(out)
+
+
+def main():
+    rate = 400.0
+    minutes = 30
+    n = int(rate * 60 * minutes)
+    rng = np.random.default_rng(0)
+    t = np.arange(n) / rate
+    rpy = np.column_stack([0.3 * np.sin(0.5 * t), 0.2 * np.sin(0.3 * t), 0.1 * t])
+    quats = from_euler(rpy)
+    accel = rotate(quats, np.array([0.0, 0.0, GRAVITY]), inverse=True) + 0.05 * rng.standard_normal((n, 3))
+    t_imu = np.arange(4 * n) / (4 * rate)
+
+    world = np.empty((n, 3))
+    euler = np.empty((n, 3))
+    q_imu = np.empty((4 * n, 4))
+    timings = [
+        ("remove_gravity", lambda: remove_gravity(quats, accel, out=world)),
+        ("to_euler", lambda: to_euler(quats, out=euler)),
+        ("multiply", lambda: multiply(quats, quats, out=q_imu[:n])),
+        ("resample x4", lambda: resample(t, quats, t_imu, out=q_imu)),
+    ]
+    print(f"{n} samples ({minutes} min at {rate:.0f} Hz)")
+    for name, fn in timings:
+        t0 = time.perf_counter()
+        fn()
+        print(f"  {name:>15}: {(time.perf_counter() - t0) * 1000:7.1f} ms")
+
+    m = 20000
+    t0 = time.perf_counter()
+    looped = _rotate_loop(quats[:m], accel[:m])
+    per_sample = (time.perf_counter() - t0) / m
+    error = np.max(np.abs(looped - rotate(quats[:m], accel[:m])))
+    print(f"  per-sample loop: {per_sample * n * 1000:7.1f} ms (extrapolated), max diff {error:.1e}")
+    print(f"  residual |linear accel| mean {np.mean(np.linalg.norm(world, axis=1)):.3f} m/s^2, "
+          f"max |euler error| {np.max(np.abs(euler[:, :2] - rpy[:, :2])):.1e} rad")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,8 @@ import qwiic_ism330dhcx
 import sys
 import time
 
-def init_imu(addr):
-    imu = qwiic_ism330dhcx.QwiicISM330DHCX(address=addr)
+def init_imu(addr, i2c_driver=None):
+    imu = qwiic_ism330dhcx.QwiicISM330DHCX(address=addr, i2c_driver=i2c_driver)
 
     imu.begin()
     imu.device_reset()
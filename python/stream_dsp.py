@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Streaming multi-rate DSP stages for sensor streams.
+
+Every stage processes one block at a time and carries its state across
+blocks, so a stream can be filtered in arbitrary chunks and give the same
+result as filtering it all at once. Blocks are shaped (n,) or
+(n, channels). Stages write into preallocated output buffers (sized by
+max_block) and return a view of them; copy the result if you keep it past
+the next call.
+
+    pipe = Pipeline([
+        Calibration(offset=OFFSET, scale=SCALE),
+        MovingMedian(5),
+        Biquad(butterworth_lowpass_sos(4, 50.0, fs=1000.0)),
+        PolyphaseDecimator(10, design_lowpass_fir(63, 40.0, fs=1000.0)),
+    ])
+    filtered = pipe.process(raw_block)     # 1 kHz in, 100 Hz out
+
+Run `python stream_dsp.py` for a throughput check on synthetic data.
+"""
+
+import time
+from typing import List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy.signal import sosfilt
+except ImportError:  # NumPy-only fallback below
+    sosfilt = None
+
+
+def _as_2d(x: np.ndarray) -> np.ndarray:
+    return x[:, None] if x.ndim == 1 else x
+
+
+# ===== Filter design =====
+
+def design_lowpass_fir(num_taps: int, cutoff_hz: float, fs: float) -> np.ndarray:
+    """Windowed-sinc (Hamming) low-pass FIR with unity DC gain."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2.0
+    taps = np.sinc(2.0 * cutoff_hz / fs * n) * np.hamming(num_taps)
+    return taps / taps.sum()
+
+
+def design_biquad_lowpass(cutoff_hz: float, fs: float, q: float = 1 / np.sqrt(2)) -> np.ndarray:
+    """RBJ cookbook low-pass biquad as one normalized SOS row [b0 b1 b2 1 a1 a2]."""
+    w0 = 2.0 * np.pi * cutoff_hz / fs
+    alpha = np.sin(w0) / (2.0 * q)
+    cos_w0 = np.cos(w0)
+    b = np.array([(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2])
+    a = np.array([1 + alpha, -2 * cos_w0, 1 - alpha])
+    return np.concatenate([b / a[0], a / a[0]])
+
+
+def butterworth_lowpass_sos(order: int, cutoff_hz: float, fs: float) -> np.ndarray:
+    """Even-order Butterworth low-pass as a cascade of biquads, shape (order/2, 6)."""
+    if order < 2 or order % 2:
+        raise ValueError(f"Order must be even and >= 2, got {order}")
+    qs = [1.0 / (2.0 * np.sin((2 * k + 1) * np.pi / (2 * order))) for k in range(order // 2)]
+    return np.stack([design_biquad_lowpass(cutoff_hz, fs, q) for q in qs])
+
+
+# ===== Stages =====
+
+class Stage:
+    """Base class: process(x, out=None) -> filtered block."""
+
+    def __init__(self, channels: int = 1, max_block: int = 4096):
+        self.channels = channels
+        self.max_block = max_block
+        self._out = np.zeros((max_block, channels))
+
+    def process(self, x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+    def _check(self, x: np.ndarray) -> np.ndarray:
+        x2 = _as_2d(x)
+        if x2.shape[0] > self.max_block or x2.shape[1] != self.channels:
+            raise ValueError(f"Block shape {x.shape} does not fit max_block={self.max_block}, "
+                             f"channels={self.channels}")
+        return x2
+
+    def _output(self, x: np.ndarray, n: int, out: Optional[np.ndarray]) -> np.ndarray:
+        """Output buffer for n rows, shaped like x (1-D in, 1-D out)."""
+        if out is None:
+            out = self._out[:n]
+            return out[:, 0] if x.ndim == 1 else out
+        return out
+
+
+class Calibration(Stage):
+    """y = (x - offset) * scale; works in place with out=x."""
+
+    def __init__(self, offset=0.0, scale=1.0, channels: int = 1, max_block: int = 4096):
+        super().__init__(channels, max_block)
+        self.offset = np.asarray(offset, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+
+    def process(self, x, out=None):
+        self._check(x)
+        out = self._output(x, len(x), out)
+        np.subtract(x, self.offset, out=out)
+        np.multiply(out, self.scale, out=out)
+        return out
+
+
+class FIRFilter(Stage):
+    """FIR filter with history carried between blocks."""
+
+    def __init__(self, taps: np.ndarray, channels: int = 1, max_block: int = 4096):
+        super().__init__(channels, max_block)
+        self.taps_rev = np.ascontiguousarray(np.asarray(taps, dtype=float)[::-1])
+        self.hist_len = len(taps) - 1
+        self._work = np.zeros((self.hist_len + max_block, channels))
+
+    def reset(self):
+        self._work[:self.hist_len] = 0.0
+
+    def _load(self, x2: np.ndarray) -> np.ndarray:
+        """Append x after the history and return sliding windows over it."""
+        n = x2.shape[0]
+        total = self.hist_len + n
+        self._work[self.hist_len:total] = x2
+        windows = sliding_window_view(self._work[:total], len(self.taps_rev), axis=0)
+        return windows  # (n, channels, taps)
+
+    def _save_history(self, n: int):
+        # Keep the last hist_len input samples for the next block
+        self._work[:self.hist_len] = self._work[n:n + self.hist_len].copy()
+
+    def process(self, x, out=None):
+        x2 = self._check(x)
+        n = x2.shape[0]
+        windows = self._load(x2)
+        result = windows @ self.taps_rev
+        self._save_history(n)
+        out = self._output(x, n, out)
+        out[...] = result[:, 0] if x.ndim == 1 else result
+        return out
+
+
+class PolyphaseDecimator(FIRFilter):
+    """Anti-alias FIR + downsample by factor, computing only the kept outputs.
+
+    Equivalent to a polyphase decimator: each kept output is one dot product
+    over the input window, so the cost is 1/factor of filtering at full rate.
+    The output phase carries across blocks of any length.
+    """
+
+    def __init__(self, factor: int, taps: Optional[np.ndarray] = None, channels: int = 1,
+                 max_block: int = 4096):
+        if taps is None:
+            # Cutoff at 80 % of the output Nyquist frequency
+            taps = design_lowpass_fir(8 * factor + 1, 0.4 / factor, 1.0)
+        super().__init__(taps, channels, max_block)
+        self.factor = factor
+        self.phase = 0  # Index in the next block of the next kept sample
+        self._out = np.zeros((max_block // factor + 1, channels))
+
+    def reset(self):
+        super().reset()
+        self.phase = 0
+
+    def process(self, x, out=None):
+        x2 = self._check(x)
+        n = x2.shape[0]
+        windows = self._load(x2)[self.phase::self.factor]
+        m = windows.shape[0]
+        result = windows @ self.taps_rev
+        self._save_history(n)
+        self.phase = (self.phase - n) % self.factor
+        out = self._output(x, m, out)
+        out[...] = result[:, 0] if x.ndim == 1 else result
+        return out
+
+
+class Biquad(Stage):
+    """IIR cascade of second-order sections (transposed direct form II).
+
+    Uses scipy.signal.sosfilt when SciPy is installed; otherwise a NumPy loop
+    over samples, vectorized across channels. Works in place with out=x.
+    """
+
+    def __init__(self, sos: np.ndarray, channels: int = 1, max_block: int = 4096):
+        super().__init__(channels, max_block)
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=float))
+        self.zi = np.zeros((self.sos.shape[0], 2, channels))
+
+    def reset(self):
+        self.zi[...] = 0.0
+
+    def process(self, x, out=None):
+        x2 = self._check(x)
+        n = x2.shape[0]
+        out = self._output(x, n, out)
+        out2 = _as_2d(out)
+        if sosfilt is not None:
+            out2[...], self.zi = sosfilt(self.sos, x2, axis=0, zi=self.zi)
+            return out
+        if out2 is not x2:
+            out2[...] = x2
+        for s, (b0, b1, b2, _, a1, a2) in enumerate(self.sos):
+            z1, z2 = self.zi[s, 0].copy(), self.zi[s, 1].copy()
+            for i in range(n):
+                xi = out2[i].copy()
+                yi = b0 * xi + z1
+                z1 = b1 * xi - a1 * yi + z2
+                z2 = b2 * xi - a2 * yi
+                out2[i] = yi
+            self.zi[s, 0], self.zi[s, 1] = z1, z2
+        return out
+
+
+class MovingMedian(Stage):
+    """Running median over the last `window` samples (spike rejection)."""
+
+    def __init__(self, window: int, channels: int = 1, max_block: int = 4096):
+        super().__init__(channels, max_block)
+        self.window = window
+        self.hist_len = window - 1
+        self._work = np.zeros((self.hist_len + max_block, channels))
+        self.primed = False
+
+    def reset(self):
+        self.primed = False
+
+    def process(self, x, out=None):
+        x2 = self._check(x)
+        n = x2.shape[0]
+        if not self.primed and n:
+            # Start from the first sample instead of zeros to avoid a start-up dip
+            self._work[:self.hist_len] = x2[0]
+            self.primed = True
+        total = self.hist_len + n
+        self._work[self.hist_len:total] = x2
+        windows = sliding_window_view(self._work[:total], self.window, axis=0)
+        result = np.median(windows, axis=-1)
+        self._work[:self.hist_len] = self._work[n:n + self.hist_len].copy()
+        out = self._output(x, n, out)
+        out[...] = result[:, 0] if x.ndim == 1 else result
+        return out
+
+
+class Pipeline:
+    """Chain of stages applied block by block."""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        for stage in self.stages:
+            x = stage.process(x)
+        return x
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+
+def main():
+    fs = 1000.0
+    channels = 6
+    block = 100
+    seconds = 20
+    rng = np.random.default_rng(0)
+    t = np.arange(int(fs * seconds)) / fs
+    signal = np.sin(2 * np.pi * 5 * t)[:, None] + 0.1 * rng.standard_normal((len(t), channels))
+
+    pipe = Pipeline([
+        Calibration(offset=0.0, scale=9.81e-3, channels=channels),
+        MovingMedian(5, channels=channels),
+        Biquad(butterworth_lowpass_sos(4, 50.0, fs), channels=channels),
+        PolyphaseDecimator(10, design_lowpass_fir(63, 40.0, fs), channels=channels),
+    ])
+    outputs = 0
+    t0 = time.perf_counter()
+    for start in range(0, len(t), block):
+        outputs += len(pipe.process(signal[start:start + block]))
+    elapsed = time.perf_counter() - t0
+    backend = "scipy" if sosfilt is not None else "numpy"
+    print(f"{len(t)} x {channels} samples -> {outputs} outputs in {elapsed * 1000:.1f} ms "
+          f"({len(t) / elapsed:.0f} samples/s per channel set, biquad backend: {backend})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""Event-triggered capture with a pre-trigger ring buffer.
+
+Samples always go into a fixed-size ring buffer; nothing touches the disk
+until a detector fires. Each trigger saves the window [t - pre_s, t + post_s]
+as its own CSV and appends a line to events.csv in the output directory.
+
+Detectors are O(1) per sample: a feature (channel value, vector magnitude or
+finite-difference velocity) compared against a threshold with hysteresis,
+debounce and a refractory period. The direction follows from the thresholds:
+on > off triggers on a rising edge, on < off on a falling edge.
+
+Config (JSON):
+    {"source": {"type": "mocap", "port": 9999},
+     "channels": ["x", "y", "z"], "rate_hz": 100, "pre_s": 0.3, "post_s": 0.3,
+     "detectors": [
+        {"name": "drop", "feature": "velocity", "channel": 1, "on": -0.05, "off": -0.01,
+         "debounce": 2, "refractory_s": 0.5}]}
+
+Source types: "mocap" (UDP marker packets), "pool" (one device of an
+i2c_bus_pool config: {"config": "i2c_pool.json", "device": "imu_a"}) and
+"loadcell" (HX711 through gpiod, {"chip": "gpiochip4"}).
+
+    python trigger_capture.py trigger.json --out events/
+"""
+
+import argparse
+import json
+import math
+import queue
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+RATE_WINDOW = 256  # Samples per input-rate measurement
+
+
+class RingBuffer:
+    """Preallocated ring of timestamped multi-channel samples."""
+
+    def __init__(self, capacity: int, channels: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.data = np.zeros((capacity, channels))
+        self.count = 0  # Total samples ever pushed
+        self.overwritten_t = -math.inf  # Time of the newest sample pushed out of the ring
+
+    def push(self, t: float, values: Sequence[float]):
+        i = self.count % self.capacity
+        if self.count >= self.capacity:
+            self.overwritten_t = self.times[i]
+        self.times[i] = t
+        self.data[i] = values
+        self.count += 1
+
+    def resize(self, capacity: int):
+        """Reallocate with room for capacity samples, keeping the newest ones in order."""
+        n = min(self.count, self.capacity, capacity)
+        idx = np.arange(self.count - n, self.count) % self.capacity
+        times = np.zeros(capacity)
+        data = np.zeros((capacity, self.data.shape[1]))
+        times[:n] = self.times[idx]
+        data[:n] = self.data[idx]
+        self.times, self.data, self.capacity, self.count = times, data, capacity, n
+
+    def window(self, t_start: float, t_end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Copy of the buffered samples with t_start <= t <= t_end, oldest first."""
+        n = min(self.count, self.capacity)
+        start = self.count - n
+        idx = np.arange(start, self.count) % self.capacity
+        times = self.times[idx]
+        mask = (times >= t_start) & (times <= t_end)
+        return times[mask], self.data[idx[mask]]
+
+
+# ===== Features =====
+
+def channel_feature(channel: int) -> Callable:
+    return lambda t, values: values[channel]
+
+
+def magnitude_feature(channels: Sequence[int]) -> Callable:
+    """Euclidean norm over channels, e.g. the three accelerometer axes."""
+    channels = list(channels)
+    return lambda t, values: math.sqrt(sum(values[c] * values[c] for c in channels))
+
+
+def velocity_feature(channel: int, alpha: float = 1.0) -> Callable:
+    """Finite-difference rate of change of one channel, optionally EMA-smoothed."""
+    state = {"t": None, "v": None, "rate": 0.0}
+
+    def feature(t, values):
+        v = values[channel]
+        if state["t"] is not None and t > state["t"]:
+            raw = (v - state["v"]) / (t - state["t"])
+            state["rate"] += alpha * (raw - state["rate"])
+        state["t"], state["v"] = t, v
+        return state["rate"]
+
+    return feature
+
+
+class ThresholdDetector:
+    """Hysteresis threshold with debounce and refractory period."""
+
+    def __init__(self, name: str, feature: Callable, on: float, off: float,
+                 debounce: int = 1, refractory_s: float = 0.0):
+        """Initialize the detector.
+
+        Args:
+            name: Event name written to the index
+            feature: f(t, values) -> float
+            on: Trigger level; rising edge if on > off, falling if on < off
+            off: Re-arm level
+            debounce: Consecutive samples past `on` required to trigger
+            refractory_s: Minimum seconds between two triggers
+        """
+        self.name = name
+        self.feature = feature
+        self.sign = 1.0 if on >= off else -1.0
+        self.on = on * self.sign
+        self.off = off * self.sign
+        self.debounce = debounce
+        self.refractory_s = refractory_s
+        self.armed = True
+        self.run = 0
+        self.last_trigger = -math.inf
+
+    def update(self, t: float, values) -> bool:
+        """Feed one sample; return True when it fires."""
+        x = self.feature(t, values) * self.sign
+        if not self.armed:
+            if x <= self.off:
+                self.armed = True
+            return False
+        if x >= self.on:
+            self.run += 1
+            if self.run >= self.debounce and t - self.last_trigger >= self.refractory_s:
+                self.armed = False
+                self.run = 0
+                self.last_trigger = t
+                return True
+        else:
+            self.run = 0
+        return False
+
+
+def build_detector(spec: dict) -> ThresholdDetector:
+    feature = spec.get("feature", "channel")
+    if feature == "channel":
+        f = channel_feature(spec["channel"])
+    elif feature == "magnitude":
+        f = magnitude_feature(spec["channels"])
+    elif feature == "velocity":
+        f = velocity_feature(spec["channel"], spec.get("alpha", 1.0))
+    else:
+        raise ValueError(f"Unknown feature: {feature}")
+    return ThresholdDetector(spec["name"], f, spec["on"], spec["off"],
+                             debounce=spec.get("debounce", 1), refractory_s=spec.get("refractory_s", 0.0))
+
+
+# ===== Capture =====
+
+class TriggerCapture:
+    """Feed samples; persist pre/post windows around every trigger."""
+
+    def __init__(self, channels: List[str], rate_hz: float, pre_s: float, post_s: float,
+                 detectors: List[ThresholdDetector], out_dir):
+        self.channels = channels
+        self.pre_s = pre_s
+        self.post_s = post_s
+        self.detectors = detectors
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        # 50 % headroom for rate jitter; grown if the source turns out to be faster than rate_hz
+        self.ring = RingBuffer(self._ring_size(rate_hz), len(channels))
+        self._rate_t0: Optional[float] = None
+        self._rate_count = 0
+
+        self.pending: List[dict] = []
+        self.event_count = 0
+        self.write_queue: "queue.Queue[Optional[Tuple[dict, np.ndarray, np.ndarray]]]" = queue.Queue()
+        self.writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer_thread.start()
+
+        index = self.out_dir / "events.csv"
+        if index.exists():
+            # Continue numbering so earlier events in this directory are kept
+            with open(index) as f:
+                self.event_count = sum(1 for _ in f) - 1
+        else:
+            index.write_text("event,detector,t_trigger,t_start,t_end,samples,file\n")
+
+    def _ring_size(self, rate_hz: float) -> int:
+        return int(math.ceil((self.pre_s + self.post_s) * rate_hz * 1.5)) + 1
+
+    def _check_rate(self, t: float):
+        """Measure the input rate every RATE_WINDOW samples and grow the ring if it is too small."""
+        if self._rate_t0 is None:
+            self._rate_t0 = t
+            return
+        self._rate_count += 1
+        if self._rate_count < RATE_WINDOW:
+            return
+        if t > self._rate_t0:
+            rate = self._rate_count / (t - self._rate_t0)
+            if self._ring_size(rate) > self.ring.capacity:
+                needed = self._ring_size(rate * 1.2)  # Extra margin so jitter does not regrow it
+                print(f"[WARN] Input at {rate:.0f} Hz, growing the ring to {needed} samples")
+                self.ring.resize(needed)
+        self._rate_t0 = t
+        self._rate_count = 0
+
+    def push(self, t: float, values: Sequence[float]):
+        """Add one sample (O(1) apart from the rare event hand-off and ring growth)."""
+        self._check_rate(t)
+        self.ring.push(t, values)
+        for det in self.detectors:
+            if det.update(t, values):
+                self.event_count += 1
+                self.pending.append({"event": self.event_count, "detector": det.name, "t_trigger": t,
+                                     "t_start": t - self.pre_s, "t_end": t + self.post_s})
+        while self.pending and t >= self.pending[0]["t_end"]:
+            self._emit(self.pending.pop(0))
+
+    def _emit(self, ev: dict):
+        if self.ring.overwritten_t >= ev["t_start"]:
+            print(f"[WARN] Event {ev['event']}: only the last {ev['t_end'] - self.ring.overwritten_t:.3f} s "
+                  f"of the {self.pre_s + self.post_s:.3f} s window were still buffered")
+        times, data = self.ring.window(ev["t_start"], ev["t_end"])
+        self.write_queue.put((ev, times, data))
+
+    def close(self):
+        """Flush events whose post-trigger window is still open, then stop the writer."""
+        for ev in self.pending:
+            self._emit(ev)
+        self.pending.clear()
+        self.write_queue.put(None)
+        self.writer_thread.join()
+
+    def _write_loop(self):
+        """Background thread: write event windows so acquisition never waits on disk."""
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            ev, times, data = item
+            name = f"event_{ev['event']:05d}_{ev['detector']}.csv"
+            np.savetxt(self.out_dir / name, np.column_stack([times, data]), delimiter=",",
+                       fmt=["%.6f"] + ["%.9g"] * len(self.channels),
+                       header="timestamp," + ",".join(self.channels), comments="")
+            with open(self.out_dir / "events.csv", 'a') as f:
+                f.write(f"{ev['event']},{ev['detector']},{ev['t_trigger']},{ev['t_start']},"
+                        f"{ev['t_end']},{len(times)},{name}\n")
+            print(f"[EVENT] {ev['detector']} @ {ev['t_trigger']:.3f} -> {name}")
+
+
+# ===== Sources =====
+
+def mocap_source(ip: str = "0.0.0.0", port: int = 9999) -> Iterator[Tuple[float, tuple]]:
+    """Mocap marker packets (3 floats, 12 bytes) as (t, (x, y, z))."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((ip, port))
+    try:
+        while True:
+            data = sock.recv(1024)
+            if len(data) == 12:
+                yield time.time(), struct.unpack('fff', data)
+    finally:
+        sock.close()
+
+
+def pool_source(config: str, device: str) -> Iterator[Tuple[float, tuple]]:
+    """One device of an I2C bus pool."""
+    from i2c_bus_pool import I2CBusPool, load_config
+
+    pool = I2CBusPool([s for s in load_config(config) if s.name == device])
+    pool.start()
+    try:
+        while True:
+            for s in pool.drain():
+                yield s.timestamp, s.values
+    finally:
+        pool.stop()
+
+
+def loadcell_source(chip: str = "gpiochip4") -> Iterator[Tuple[float, tuple]]:
+    """Raw HX711 counts through gpiod."""
+    import gpiod
+    from read_loadcell_gpiod import PIN_DT, PIN_SCK, read_raw
+
+    gpio = gpiod.Chip(chip)
+    dt_line = gpio.get_line(PIN_DT)
+    sck_line = gpio.get_line(PIN_SCK)
+    dt_line.request(consumer="loadcell", type=gpiod.LINE_REQ_DIR_IN)
+    sck_line.request(consumer="loadcell", type=gpiod.LINE_REQ_DIR_OUT)
+    while True:
+        value = read_raw(gpio, dt_line, sck_line)
+        yield time.time(), (float(value),)
+
+
+SOURCES: Dict[str, Callable] = {"mocap": mocap_source, "pool": pool_source, "loadcell": loadcell_source}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-triggered capture with pre-trigger buffer")
+    parser.add_argument("config", help="JSON trigger config")
+    parser.add_argument("--out", default="events", help="Output directory (default: events)")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    source_cfg = dict(config["source"])
+    source = SOURCES[source_cfg.pop("type")](**source_cfg)
+    capture = TriggerCapture(config["channels"], config["rate_hz"], config["pre_s"], config["post_s"],
+                             [build_detector(d) for d in config["detectors"]], args.out)
+    print(f"[OK] Watching {len(capture.detectors)} detector(s), writing events to {args.out}")
+    try:
+        for t, values in source:
+            capture.push(t, values)
+    except KeyboardInterrupt:
+        print("\n[EXIT] Stopping capture.")
+    finally:
+        capture.close()
+        print(f"[OK] {capture.event_count} event(s) captured")
+
+
+if __name__ == '__main__':
+    main()